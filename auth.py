@@ -1,13 +1,23 @@
 """
 Authentication and security utilities.
 """
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+import metrics
+from cache import TTLCache
 from database import get_db
 from models import User, UserRole
 
@@ -16,9 +26,42 @@ SECRET_KEY = "your-secret-key-change-in-production-123456789"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 
+# bcrypt work factor; each extra round doubles hashing time
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Password hashing runs on a dedicated process pool so login bursts cannot
+# starve the event loop or the request threadpool. Set PASSWORD_HASH_WORKERS=0 to hash inline
+# (e.g. on serverless hosts without multiprocessing).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "16"))
+
 # HTTP Bearer token scheme
 security = HTTPBearer()
 
+# Cache of token -> authenticated user, so most requests skip the user lookup.
+# Only ORM changes made in this process invalidate it; a change made by
+# another worker or with a Core UPDATE/DELETE is seen once the entry expires,
+# so the TTL bounds how long a changed or deleted user stays authenticated.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "10"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+metrics.registry.register_cache("users", user_cache)
+
+def invalidate_user(user_id: int):
+    """
+    Drop cached entries for a user so the next request reloads it.
+
+    Args:
+        user_id: ID of the modified user
+    """
+    user_cache.remove_if(lambda token, user: user.id == user_id)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Invalidate the user cache when this process changes a user through the ORM."""
+    invalidate_user(target.id)
+
 def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt.
@@ -31,7 +74,7 @@ def hash_password(password: str) -> str:
     """
     # Convert password to bytes and hash it
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     # Return as string for database storage
     return hashed.decode('utf-8')
@@ -51,6 +94,82 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
 
+_password_executor = None
+_password_executor_lock = threading.Lock()
+_password_slots = threading.BoundedSemaphore(max(PASSWORD_HASH_WORKERS, 1) + PASSWORD_HASH_QUEUE_LIMIT)
+
+def _get_password_executor() -> ProcessPoolExecutor:
+    """Create the password hashing process pool on first use."""
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is None:
+            _password_executor = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _password_executor
+
+def _discard_password_executor(broken: ProcessPoolExecutor):
+    """Drop a pool whose worker died (e.g. OOM-killed) so the next task starts a new one."""
+    global _password_executor
+    with _password_executor_lock:
+        # Concurrent tasks may all see the same broken pool; replace it once
+        if _password_executor is broken:
+            _password_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+async def run_password_task(func, *args):
+    """
+    Run hash_password or verify_password on the password hashing pool.
+    
+    At most PASSWORD_HASH_WORKERS tasks run at once with up to
+    PASSWORD_HASH_QUEUE_LIMIT more waiting; anything beyond that is
+    rejected immediately instead of queueing without bound. If a worker
+    process dies, the pool is replaced and the task retried once.
+    
+    Args:
+        func: hash_password or verify_password
+        *args: Arguments passed to func
+        
+    Returns:
+        Result of func
+        
+    Raises:
+        HTTPException: 503 if the hashing queue is full or the pool keeps failing
+    """
+    if not _password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        if PASSWORD_HASH_WORKERS <= 0:
+            # With no process pool, fall back to the default thread executor
+            return await loop.run_in_executor(None, func, *args)
+        for attempt in range(2):
+            executor = _get_password_executor()
+            try:
+                return await loop.run_in_executor(executor, func, *args)
+            except BrokenProcessPool:
+                _discard_password_executor(executor)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        _password_slots.release()
+
+def shutdown_password_executor():
+    """Stop the password hashing pool, if it was started."""
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is not None:
+            _password_executor.shutdown(wait=False, cancel_futures=True)
+            _password_executor = None
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -95,13 +214,19 @@ def decode_token(token: str) -> dict:
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Dependency to get the current authenticated user.
     
+    Users are cached per token for up to USER_CACHE_TTL_SECONDS (never past
+    the token's expiry). A role change or deletion made in another process
+    takes effect when the entry expires, so a request may still see the old
+    user for that long. Cached users are detached from any session, so only
+    their column attributes may be used.
+    
     Args:
         credentials: HTTP Bearer credentials
         db: Database session
@@ -113,6 +238,10 @@ def get_current_user(
         HTTPException: If authentication fails
     """
     token = credentials.credentials
+    cached_user = user_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     payload = decode_token(token)
     
     # Extract user ID from token (stored as string in JWT, convert to int)
@@ -131,13 +260,22 @@ def get_current_user(
             detail="Invalid token format"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
     
+    # Detach so the cached copy can outlive this request's session
+    db.expunge(user)
+    ttl = USER_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        user_cache.set(token, user, ttl=ttl)
+    
     return user
 
 def require_role(required_role: UserRole):
@@ -150,7 +288,7 @@ def require_role(required_role: UserRole):
     Returns:
         Dependency function that validates user role
     """
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -0,0 +1,426 @@
+"""
+Load-test harness.
+
+Drives the API with a weighted mix of browse, search, checkout and seller
+scenarios from --concurrency simulated clients for --duration seconds, then
+prints p50/p95/p99 latency and throughput per endpoint and appends the run
+to a JSON Lines results file, so runs on different commits, datasets or
+settings can be compared.
+
+Generate a dataset first (python generate_data.py), then either drive the
+app in-process through httpx, which leaves out the network and server:
+    python benchmark.py
+or over HTTP, starting uvicorn for the run or using a running server:
+    python benchmark.py --serve --workers 2
+    python benchmark.py --url http://localhost:8000
+
+--app-dir serves another checkout of the app (e.g. a git worktree of an
+older commit) against the same database, and --baseline compares a run
+with an earlier labelled one, so two versions can be measured back to back:
+    git worktree add ../shop-sync 95d7900
+    python benchmark.py --serve --app-dir ../shop-sync --label sync
+    python benchmark.py --serve --label async --baseline sync
+
+The harness reads user and product ids from DATABASE_URL and signs tokens
+with the app's key, so it must point at the same database as the server.
+Checkouts place real orders and reduce stock.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import httpx
+from sqlalchemy import func, select
+from auth import create_access_token
+from database import engine
+from generate_data import LOADTEST_EMAIL_DOMAIN, SEARCH_TERMS, popular_index
+from models import Order, OrderItem, Product, User, UserRole
+
+DEFAULT_MIX = "browse=50,search=20,checkout=10,seller=20"
+DEFAULT_RESULTS_FILE = "benchmark_results.jsonl"
+
+# Requests made during warm-up are not recorded
+DEFAULT_WARMUP_SECONDS = 5
+
+# Generated users each scenario picks from
+USER_SAMPLE_SIZE = 1000
+
+PERCENTILES = (50, 95, 99)
+
+class Workload:
+    """Ids and tokens the scenarios pick from, read from the database once."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        pattern = f"loadtest-%@{LOADTEST_EMAIL_DOMAIN}"
+        with engine.connect() as conn:
+            buyer_ids = conn.execute(
+                select(User.id).where(User.role == UserRole.BUYER, User.email.like(pattern))
+                .order_by(User.id).limit(USER_SAMPLE_SIZE)
+            ).scalars().all()
+            seller_ids = conn.execute(
+                select(User.id).where(User.role == UserRole.SELLER, User.email.like(pattern))
+                .order_by(User.id).limit(USER_SAMPLE_SIZE)
+            ).scalars().all()
+            first_product_id, last_product_id = conn.execute(
+                select(func.min(Product.id), func.max(Product.id))
+            ).one()
+            self.dataset = {
+                "users": conn.execute(select(func.count()).select_from(User)).scalar(),
+                "products": conn.execute(select(func.count()).select_from(Product)).scalar(),
+                "orders": conn.execute(select(func.count()).select_from(Order)).scalar(),
+                "order_items": conn.execute(select(func.count()).select_from(OrderItem)).scalar(),
+            }
+        if not buyer_ids or not seller_ids or first_product_id is None:
+            raise ValueError("No generated dataset found; run python generate_data.py first")
+
+        self.buyer_tokens = [self.token(user_id) for user_id in buyer_ids]
+        self.seller_tokens = [self.token(user_id) for user_id in seller_ids]
+        self.first_product_id = first_product_id
+        self.product_count = last_product_id - first_product_id + 1
+
+    @staticmethod
+    def token(user_id: int) -> dict:
+        """Authorization header for a user."""
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+    def product_id(self) -> int:
+        """Pick a product id, favoring popular (low-id) products like the generated orders do."""
+        return self.first_product_id + popular_index(self.rng, self.product_count)
+
+class Recorder:
+    """Latency samples per endpoint label."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.recording = False
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs):
+        """Send a request, recording its latency under ``label`` once warm-up is over."""
+        began = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response = None
+            failed = True
+        elapsed = time.perf_counter() - began
+        if self.recording:
+            self.samples.setdefault(label, []).append(elapsed)
+            if failed:
+                self.errors[label] = self.errors.get(label, 0) + 1
+        return response
+
+async def browse(client, workload: Workload, recorder: Recorder):
+    """A shopper opens the catalog, pages once and views a product."""
+    response = await recorder.request(client, "GET /api/products", "GET", "/api/products", params={"limit": 20})
+    next_cursor = response.json().get("next_cursor") if response is not None and response.status_code == 200 else None
+    if next_cursor:
+        await recorder.request(
+            client, "GET /api/products?cursor", "GET", "/api/products",
+            params={"limit": 20, "cursor": next_cursor}
+        )
+    await recorder.request(client, "GET /api/products/{id}", "GET", f"/api/products/{workload.product_id()}")
+
+async def search(client, workload: Workload, recorder: Recorder):
+    """A shopper searches for one or two words."""
+    words = workload.rng.sample(SEARCH_TERMS, workload.rng.randint(1, 2))
+    await recorder.request(
+        client, "GET /api/products?search", "GET", "/api/products",
+        params={"search": " ".join(words), "limit": 20}
+    )
+
+async def checkout(client, workload: Workload, recorder: Recorder):
+    """A buyer orders one to three products."""
+    product_ids = {workload.product_id() for _ in range(workload.rng.randint(1, 3))}
+    await recorder.request(
+        client, "POST /api/orders", "POST", "/api/orders",
+        headers=workload.rng.choice(workload.buyer_tokens),
+        json={"items": [{"product_id": product_id, "quantity": 1} for product_id in product_ids]}
+    )
+
+async def seller(client, workload: Workload, recorder: Recorder):
+    """A seller checks recent sales, orders and listings."""
+    headers = workload.rng.choice(workload.seller_tokens)
+    await recorder.request(
+        client, "GET /api/orders/seller/stats", "GET", "/api/orders/seller/stats", headers=headers
+    )
+    await recorder.request(
+        client, "GET /api/orders/seller/orders", "GET", "/api/orders/seller/orders",
+        headers=headers, params={"limit": 50}
+    )
+    await recorder.request(
+        client, "GET /api/products/seller/my-products", "GET", "/api/products/seller/my-products",
+        headers=headers, params={"limit": 50}
+    )
+
+SCENARIOS = {
+    "browse": browse,
+    "search": search,
+    "checkout": checkout,
+    "seller": seller,
+}
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse a scenario mix such as ``browse=60,checkout=40``.
+
+    Raises:
+        ValueError: If a scenario is unknown or no weight is positive
+    """
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    if sum(weights.values()) <= 0:
+        raise ValueError("At least one scenario needs a positive weight")
+    return weights
+
+def percentile(sorted_samples: List[float], percent: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    rank = max(int(round(percent / 100 * len(sorted_samples) + 0.5)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+def summarize(samples: List[float], errors: int, duration: float) -> dict:
+    """Throughput and latency percentiles (in milliseconds) of one set of samples."""
+    samples = sorted(samples)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / duration, 1),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2),
+    }
+    for percent in PERCENTILES:
+        summary[f"p{percent}_ms"] = round(percentile(samples, percent) * 1000, 2)
+    summary["max_ms"] = round(samples[-1] * 1000, 2)
+    return summary
+
+async def client_loop(client, workload: Workload, recorder: Recorder, weights: Dict[str, float], deadline: float):
+    """Run scenarios picked by weight until the deadline."""
+    names = list(weights)
+    scenario_weights = [weights[name] for name in names]
+    while time.perf_counter() < deadline:
+        name = workload.rng.choices(names, scenario_weights)[0]
+        await SCENARIOS[name](client, workload, recorder)
+
+async def run_load(client, workload: Workload, weights: Dict[str, float], concurrency: int,
+                   duration: float, warmup: float) -> Recorder:
+    """Warm up, then run the mix from ``concurrency`` clients for ``duration`` seconds."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + warmup
+    await asyncio.gather(*(client_loop(client, workload, recorder, weights, deadline) for _ in range(concurrency)))
+
+    recorder.recording = True
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client_loop(client, workload, recorder, weights, deadline) for _ in range(concurrency)))
+    return recorder
+
+async def run_in_process(workload: Workload, weights, concurrency: int, duration: float, warmup: float) -> Recorder:
+    """Drive the app through httpx's ASGI transport, running its startup and shutdown handlers."""
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        # Unhandled app errors count as 500 responses, as they would behind uvicorn
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await run_load(client, workload, weights, concurrency, duration, warmup)
+
+async def run_over_http(url: str, workload: Workload, weights, concurrency: int, duration: float, warmup: float) -> Recorder:
+    """Drive a server over HTTP with one pooled connection per simulated client."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await run_load(client, workload, weights, concurrency, duration, warmup)
+
+def free_port() -> int:
+    """Ask the OS for an unused local port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workers: int, app_dir: Optional[str] = None) -> Tuple[subprocess.Popen, str]:
+    """
+    Start uvicorn on a free port and wait until it serves requests.
+
+    Args:
+        workers: uvicorn worker processes
+        app_dir: Checkout to import main:app from instead of this one. The
+            server still runs in the current directory, so relative paths
+            such as the default SQLite file point at the same database.
+
+    Raises:
+        RuntimeError: If the server exits or does not answer within a minute
+    """
+    port = free_port()
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--no-access-log",
+    ]
+    if app_dir:
+        command += ["--app-dir", os.path.abspath(app_dir)]
+    server = subprocess.Popen(command)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/api/products", params={"limit": 1}).status_code == 200:
+                return server, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 60 seconds")
+
+def git_commit(path: Optional[str] = None) -> Optional[str]:
+    """Current commit of a working tree (default: this one), if it is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=path
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def previous_result(results_file: str, result: dict, baseline_label: Optional[str] = None) -> Optional[dict]:
+    """
+    Find the run to compare with.
+
+    Args:
+        results_file: JSON Lines results file
+        result: The run just finished
+        baseline_label: Compare with the latest run of this label instead of
+            the latest run of the same target
+
+    Returns:
+        The latest earlier run with the same mix and concurrency, and the
+        same target or the given label; None if there is none
+    """
+    if not os.path.exists(results_file):
+        return None
+    match = None
+    with open(results_file) as file:
+        for line in file:
+            try:
+                earlier = json.loads(line)
+            except ValueError:
+                continue
+            if earlier.get("mix") != result["mix"] or earlier.get("concurrency") != result["concurrency"]:
+                continue
+            if (earlier.get("label") == baseline_label) if baseline_label else (earlier.get("target") == result["target"]):
+                match = earlier
+    return match
+
+def print_report(result: dict, baseline: Optional[dict]):
+    """Print the per-endpoint table, with p95 and throughput changes against a baseline run."""
+    print(f"\n{'endpoint':40} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    rows = list(result["endpoints"].items()) + [("total", result["total"])]
+    for label, stats in rows:
+        line = (
+            f"{label:40} {stats['requests']:7} {stats['errors']:5} {stats['throughput_rps']:8.1f} "
+            f"{stats['p50_ms']:8.2f} {stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f}"
+        )
+        before = baseline and (baseline["total"] if label == "total" else baseline["endpoints"].get(label))
+        if before:
+            line += (
+                f"   p95 {stats['p95_ms'] / before['p95_ms'] - 1:+.0%}"
+                f" rps {stats['throughput_rps'] / before['throughput_rps'] - 1:+.0%}"
+            )
+        print(line)
+    if baseline:
+        commit = f" at {baseline['git_commit']}" if baseline.get("git_commit") else ""
+        print(f"\nCompared with {baseline.get('label') or baseline['timestamp']}{commit}")
+
+def main():
+    """Parse options, run the benchmark and record the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the API with a scenario mix")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    target.add_argument("--serve", action="store_true", help="start uvicorn for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --serve")
+    parser.add_argument("--app-dir", help="with --serve, serve the app from this checkout (e.g. a git worktree)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=16, help="simulated clients")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to record")
+    parser.add_argument("--warmup", type=float, default=DEFAULT_WARMUP_SECONDS, help="seconds before recording")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", help="name for this run in the results file")
+    parser.add_argument("--baseline", help="compare with the latest run of this label")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSON Lines file to append results to")
+    args = parser.parse_args()
+    if args.concurrency < 1 or args.duration <= 0 or args.warmup < 0:
+        parser.error("--concurrency and --duration must be positive and --warmup not negative")
+    if args.app_dir and not args.serve:
+        parser.error("--app-dir requires --serve")
+    try:
+        weights = parse_mix(args.mix)
+        workload = Workload(args.seed)
+    except ValueError as e:
+        parser.exit(1, f"Error: {e}\n")
+
+    server = None
+    commit = git_commit(args.app_dir)
+    if args.serve:
+        server, url = start_server(args.workers, args.app_dir)
+        target_name = f"uvicorn x{args.workers}"
+    else:
+        url = args.url
+        target_name = url or "in-process"
+    try:
+        if url:
+            recorder = asyncio.run(run_over_http(url, workload, weights, args.concurrency, args.duration, args.warmup))
+        else:
+            recorder = asyncio.run(run_in_process(workload, weights, args.concurrency, args.duration, args.warmup))
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                # Graceful shutdown waits for queued requests, which an
+                # overloaded server may not finish
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    if not recorder.samples:
+        parser.exit(1, "Error: no requests completed; increase --duration\n")
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    result = {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "label": args.label,
+        "git_commit": commit,
+        "target": target_name,
+        "database": engine.dialect.name,
+        "mix": weights,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "seed": args.seed,
+        "dataset": workload.dataset,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "total": summarize(all_samples, sum(recorder.errors.values()), args.duration),
+        "endpoints": {
+            label: summarize(samples, recorder.errors.get(label, 0), args.duration)
+            for label, samples in sorted(recorder.samples.items())
+        },
+    }
+
+    print_report(result, previous_result(args.output, result, args.baseline))
+    with open(args.output, "a") as file:
+        file.write(json.dumps(result) + "\n")
+    print(f"\n[OK] Results appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
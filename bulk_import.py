@@ -0,0 +1,150 @@
+"""
+Parsing for bulk uploads.
+
+Uploads may be a JSON array, NDJSON (one JSON object per line) or CSV with
+a header row. NDJSON and CSV bodies are parsed incrementally as they stream
+in, so rows can be validated and written in batches while the rest of the
+upload is still arriving.
+"""
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterator, List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "1000"))
+
+# At most this many per-row errors are returned in a response
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))
+
+UPLOAD_FORMATS = {
+    "application/json": "json",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+# (row number, parsed row or None, parse error or None). Row numbers start
+# at 1 for the first data row (after the CSV header).
+UploadRow = Tuple[int, Optional[dict], Optional[str]]
+
+async def iter_lines(request: Request) -> AsyncIterator[str]:
+    """Yield the lines of a UTF-8 request body as it streams in."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+async def iter_json_array(request: Request) -> AsyncIterator[UploadRow]:
+    """Yield the elements of a JSON array body."""
+    try:
+        rows = json.loads(await request.body())
+    except (UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array"
+        )
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array"
+        )
+    for row_number, row in enumerate(rows, start=1):
+        yield row_number, row, None
+
+async def iter_ndjson(request: Request) -> AsyncIterator[UploadRow]:
+    """Yield one row per non-blank NDJSON line."""
+    row_number = 0
+    async for line in iter_lines(request):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line), None
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+
+async def iter_csv_records(request: Request) -> AsyncIterator[str]:
+    """Group physical lines into CSV records, allowing newlines inside quoted fields."""
+    record = []
+    quotes = 0
+    async for line in iter_lines(request):
+        record.append(line)
+        quotes += line.count('"')
+        # Escaped quotes come in pairs, so an odd count means an open field
+        if quotes % 2 == 0:
+            yield "\n".join(record)
+            record = []
+            quotes = 0
+    if record:
+        yield "\n".join(record)
+
+async def iter_csv(request: Request) -> AsyncIterator[UploadRow]:
+    """Yield one row per CSV record, keyed by the header row. Empty cells are omitted."""
+    header = None
+    row_number = 0
+    async for record in iter_csv_records(request):
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) > len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}, None
+
+def format_validation_error(error: ValidationError) -> str:
+    """Summarize a row's validation errors as one line, e.g. ``price: Input should be a valid number``."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+def parse_upload(request: Request) -> AsyncIterator[UploadRow]:
+    """
+    Pick the parser for an upload from its Content-Type.
+
+    Args:
+        request: Incoming request
+
+    Returns:
+        Async iterator of (row number, row, error) tuples
+
+    Raises:
+        HTTPException: If the Content-Type is not supported
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    upload_format = UPLOAD_FORMATS.get(content_type)
+    if upload_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be application/json, application/x-ndjson or text/csv"
+        )
+    if upload_format == "csv":
+        return iter_csv(request)
+    if upload_format == "ndjson":
+        return iter_ndjson(request)
+    return iter_json_array(request)
+
+async def batched(rows: AsyncIterator[UploadRow], size: int = BULK_IMPORT_BATCH_SIZE) -> AsyncIterator[List[UploadRow]]:
+    """Group an async iterator of rows into lists of at most ``size`` rows."""
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
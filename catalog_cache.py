@@ -0,0 +1,169 @@
+"""
+Read-through cache for the public product catalog.
+
+Caches serialized products by id and catalog listing pages by query
+(search, cursor, limit). Entries are tagged with the persistent catalog
+versions from the ``catalog_state`` table, which every write bumps in its
+own transaction, so each worker notices changes made by any other worker
+on its next read:
+
+- ``version`` changes when products are created, edited or deleted. Entries
+  from an older version are never served.
+- ``stock_version`` changes when only stock changes (checkouts, inventory
+  sync). Entries from an older stock version are served after re-reading
+  just the stock of their products, so checkouts do not empty the cache.
+
+Both versions also drive HTTP ETags for catalog listings.
+"""
+import os
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import select, update
+import metrics
+from cache import TTLCache
+from models import CatalogState, Product
+
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "30"))
+PRODUCT_CACHE_MAX_SIZE = int(os.getenv("PRODUCT_CACHE_MAX_SIZE", "10000"))
+LISTING_CACHE_MAX_SIZE = int(os.getenv("LISTING_CACHE_MAX_SIZE", "1000"))
+
+# product id -> (product, version, stock_version)
+product_cache = TTLCache(maxsize=PRODUCT_CACHE_MAX_SIZE, ttl=PRODUCT_CACHE_TTL_SECONDS)
+# listing_key() -> (page, stock_version)
+listing_cache = TTLCache(maxsize=LISTING_CACHE_MAX_SIZE, ttl=PRODUCT_CACHE_TTL_SECONDS)
+
+# Hit ratio and evictions are exported on GET /metrics
+metrics.registry.register_cache("products", product_cache)
+metrics.registry.register_cache("listings", listing_cache)
+
+def listing_key(search: Optional[str], cursor: Optional[str], limit: int, version: int) -> tuple:
+    """
+    Build the cache key for a catalog listing page.
+
+    Including the persistent catalog version means writes made by other
+    workers also stop this worker from serving an older page.
+    """
+    return (search or None, cursor, limit, version)
+
+def get_product(product_id: int, version: int) -> Optional[tuple]:
+    """
+    Get a cached product.
+
+    Args:
+        product_id: Product ID
+        version: Current catalog version
+
+    Returns:
+        Tuple of (product, stock_version it was read at), or None on a miss
+        or if the product was cached before the catalog last changed
+    """
+    entry = product_cache.get(product_id)
+    if entry is None or entry[1] != version:
+        return None
+    return entry[0], entry[2]
+
+def set_product(product_id: int, product: dict, version: int, stock_version: int):
+    """
+    Cache a product read from the database.
+
+    Args:
+        product_id: Product ID
+        product: Serialized product
+        version: Catalog version read before the product
+        stock_version: Stock version read before the product
+    """
+    product_cache.set(product_id, (product, version, stock_version))
+
+def get_listing(key: tuple) -> Optional[tuple]:
+    """Get a cached listing page as (page, stock_version it was read at), or None on a miss."""
+    return listing_cache.get(key)
+
+def set_listing(key: tuple, page: dict, stock_version: int):
+    """
+    Cache a listing page read from the database.
+
+    Args:
+        key: Key from listing_key()
+        page: Page with serialized ``items`` and ``next_cursor``
+        stock_version: Stock version read before the page
+    """
+    listing_cache.set(key, (page, stock_version))
+
+async def refresh_stock(db, products: List[dict]) -> List[dict]:
+    """
+    Re-read the stock of cached products.
+
+    Stock does not affect which products a listing page holds or their
+    order, so a page only needs its stock levels (and the updated_at the
+    stock change set) brought up to date.
+
+    Args:
+        db: Async database session
+        products: Serialized products
+
+    Returns:
+        Copies of the products with current stock and updated_at
+    """
+    if not products:
+        return products
+    result = await db.execute(
+        select(Product.id, Product.stock, Product.updated_at)
+        .where(Product.id.in_([product["id"] for product in products]))
+    )
+    current = {row.id: row for row in result}
+    return [
+        {**product, "stock": current[product["id"]].stock, "updated_at": current[product["id"]].updated_at}
+        if product["id"] in current else product
+        for product in products
+    ]
+
+def catalog_version_update():
+    """Build the UPDATE statement that records a catalog change."""
+    return (
+        update(CatalogState)
+        .where(CatalogState.id == 1)
+        .values(version=CatalogState.version + 1, updated_at=datetime.utcnow())
+    )
+
+async def bump_catalog_version(db):
+    """
+    Record a product creation, edit or deletion in the current transaction.
+
+    Call before committing any write that changes products other than
+    their stock. Sync scripts execute catalog_version_update() on their
+    session instead.
+
+    Args:
+        db: Async database session holding the write
+    """
+    await db.execute(catalog_version_update())
+
+async def bump_stock_version(db):
+    """
+    Record a stock-only change in the current transaction.
+
+    Args:
+        db: Async database session holding the write
+    """
+    await db.execute(
+        update(CatalogState)
+        .where(CatalogState.id == 1)
+        .values(stock_version=CatalogState.stock_version + 1, updated_at=datetime.utcnow())
+    )
+
+async def get_catalog_state(db) -> tuple:
+    """
+    Get the persistent catalog versions.
+
+    Args:
+        db: Async database session
+
+    Returns:
+        Tuple of (version, stock_version, updated_at); (0, 0, None) if the row is missing
+    """
+    result = await db.execute(
+        select(CatalogState.version, CatalogState.stock_version, CatalogState.updated_at)
+        .where(CatalogState.id == 1)
+    )
+    row = result.first()
+    return (row.version, row.stock_version, row.updated_at) if row else (0, 0, None)
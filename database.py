@@ -1,39 +1,262 @@
 """
 Database configuration and session management.
 """
-from sqlalchemy import create_engine
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import metrics
+import slow_queries
 
-# SQLite database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./ecommerce.db"
+try:
+    import fcntl
+except ImportError:  # not available on Windows; SQLite setup then runs unlocked
+    fcntl = None
 
-# Create engine with check_same_thread=False for SQLite
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Database URLs. DATABASE_URL may point at SQLite (default) or PostgreSQL;
+# DATABASE_REPLICA_URL optionally points catalog reads at a read replica.
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ecommerce.db")
+SQLALCHEMY_REPLICA_DATABASE_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Default sync driver (scripts, schema setup) and async driver (API routes)
+# for each supported backend
+SYNC_DRIVERS = {
+    "sqlite": "sqlite",
+    "postgresql": "postgresql+psycopg2",
+}
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# SQLite tuning profiles applied to every new connection. "production" uses
+# WAL so readers never block the checkout writer; "default" keeps SQLite's
+# stock rollback-journal settings.
+SQLITE_PRAGMA_PROFILES = {
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,  # ms to wait for a lock before "database is locked"
+        "cache_size": -64000,  # negative means KiB, i.e. 64 MB per connection
+        "mmap_size": 268435456,  # 256 MB
+        "temp_store": "MEMORY",
+    },
+    "default": {},
+}
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+
+# Connection pool size per process; size it to the number of concurrent
+# requests a worker should run against the database
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Key of the PostgreSQL advisory lock held while the schema is set up
+SCHEMA_LOCK_KEY = 720_517_001
+
+def normalize_url(url: str):
+    """
+    Parse a database URL, accepting the ``postgres://`` scheme used by hosts like Render.
+
+    Args:
+        url: Database URL
+
+    Returns:
+        SQLAlchemy URL object, with the default sync driver if none was given
+    """
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    if "+" not in parsed.drivername and parsed.drivername in SYNC_DRIVERS:
+        parsed = parsed.set(drivername=SYNC_DRIVERS[parsed.drivername])
+    return parsed
+
+def to_async_url(url):
+    """
+    Get the async driver URL for a database URL.
+
+    Args:
+        url: SQLAlchemy URL object
+
+    Returns:
+        URL using the backend's async driver
+
+    Raises:
+        ValueError: If the backend is not supported
+    """
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Unsupported database backend: {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the configured SQLite pragma profile to a new connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMA_PROFILES[SQLITE_PROFILE].items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+def engine_options(url) -> dict:
+    """
+    Get engine keyword arguments for a database URL.
+
+    Args:
+        url: SQLAlchemy URL object, with the driver the engine will use
+
+    Returns:
+        Keyword arguments for create_engine / create_async_engine
+    """
+    options = {}
+    # Pool sizing only applies to queue pools (file SQLite, PostgreSQL);
+    # in-memory SQLite uses a single-connection pool that rejects it
+    if issubclass(url.get_dialect().get_pool_class(url), QueuePool):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    if url.get_backend_name() == "sqlite":
+        # Allow pooled SQLite connections to be used from any thread
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        # Drop connections the server closed while they sat in the pool
+        options["pool_pre_ping"] = True
+    return options
+
+def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    """Record when a SQL statement starts (engine event)."""
+    if context is not None:
+        context.started_at = time.perf_counter()
+
+def finish_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    """Report a finished SQL statement to the metrics and, if slow, the slow-query log (engine event)."""
+    started = getattr(context, "started_at", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    metrics.registry.observe_query(seconds)
+    if seconds >= slow_queries.SLOW_QUERY_THRESHOLD_SECONDS:
+        method, route = metrics.current_route()
+        slow_queries.report(
+            conn.dialect.name, conn.dialect.driver, statement, parameters, executemany,
+            seconds, method, route
+        )
+
+def configure_engine(sync_engine):
+    """Register connection setup and statement timing on an engine."""
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    event.listen(sync_engine, "before_cursor_execute", start_statement_timer)
+    event.listen(sync_engine, "after_cursor_execute", finish_statement_timer)
+
+database_url = normalize_url(SQLALCHEMY_DATABASE_URL)
+
+# Sync engine for scripts and schema setup
+engine = create_engine(database_url, **engine_options(database_url))
+configure_engine(engine)
+
+# Async engine used by the API routes, so queries never block a threadpool thread
+async_database_url = to_async_url(database_url)
+async_engine = create_async_engine(async_database_url, **engine_options(async_database_url))
+configure_engine(async_engine.sync_engine)
+
+def create_replica_engine(url: str):
+    """
+    Create the async engine for a read replica, set up like the primary's.
+
+    Args:
+        url: Replica database URL, in the same forms as DATABASE_URL
+
+    Returns:
+        Async engine for the replica
+    """
+    replica_url = to_async_url(normalize_url(url))
+    replica_engine = create_async_engine(replica_url, **engine_options(replica_url))
+    configure_engine(replica_engine.sync_engine)
+    return replica_engine
+
+# Catalog reads go to the replica when one is configured, otherwise the primary
+if SQLALCHEMY_REPLICA_DATABASE_URL:
+    replica_async_engine = create_replica_engine(SQLALCHEMY_REPLICA_DATABASE_URL)
+else:
+    replica_async_engine = async_engine
 
 # Create SessionLocal class for database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions keep attributes loaded after commit, since lazy loads are
+# not possible once a response is being serialized
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+ReadSessionLocal = async_sessionmaker(
+    replica_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
-def get_db():
+async def get_db():
     """
-    Dependency function to get database session.
+    Dependency function to get an async database session.
     Yields a database session and ensures it's closed after use.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    """
+    Dependency function to get a read-only session on the read replica.
+    Falls back to the primary when no replica is configured. Replicas may lag
+    behind the primary, so only use this for reads that tolerate staleness.
+    """
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+@contextmanager
+def schema_lock(bind):
+    """
+    Hold a lock shared by every process using the database.
+
+    PostgreSQL uses a session advisory lock; SQLite locks a file next to the
+    database file.
+
+    Args:
+        bind: Engine of the database to lock
+    """
+    if bind.dialect.name == "postgresql":
+        with bind.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        return
+
+    database_path = bind.url.database
+    if fcntl is None or not database_path or database_path == ":memory:":
+        yield
+        return
+    with open(database_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
 def init_db():
     """
-    Initialize database by creating all tables.
+    Initialize database by creating all tables and applying migrations.
+
+    Run once per deploy with ``python migrations.py`` rather than from every
+    server process. Concurrent runs take turns under schema_lock, so a
+    second run finds nothing left to do.
     """
     from models import User, Product, Order, OrderItem
-    Base.metadata.create_all(bind=engine)
+    from migrations import run_migrations
+    from search import init_search_index
+    with schema_lock(engine):
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        init_search_index(engine)
@@ -0,0 +1,68 @@
+"""
+Fast JSON responses for list endpoints.
+
+With ``response_model``, FastAPI validates every returned object against the
+Pydantic model and then serializes it again. List routes opt out of that by
+selecting exactly the response columns and returning a FastJSONResponse,
+which FastAPI sends as-is; ``response_model`` stays on the route for the
+OpenAPI schema. Uses orjson when installed, otherwise the standard library.
+"""
+import json
+from datetime import datetime
+from enum import Enum
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+def _encode_default(value):
+    """Encode values the standard library json module does not handle."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    """
+    Serialize content to compact UTF-8 JSON.
+
+    Naive datetimes are written in ISO 8601 without an offset and enums as
+    their values, the same as Pydantic's JSON mode.
+
+    Args:
+        content: Dictionaries, lists and scalars to serialize
+
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content,
+        default=_encode_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized with the fast encoder and no validation."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def response_columns(schema, model) -> list:
+    """
+    Get the model columns matching a response schema's fields, in order.
+
+    Args:
+        schema: Pydantic response model whose fields are all model columns
+        model: SQLAlchemy model
+
+    Returns:
+        List of column attributes to pass to select()
+    """
+    return [getattr(model, field) for field in schema.model_fields]
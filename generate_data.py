@@ -0,0 +1,296 @@
+"""
+Synthetic dataset generator for load testing.
+
+Bulk-loads sellers, buyers, products and a history of orders sized by
+command-line options, e.g. one million products and ten million order items:
+    python generate_data.py --products 1000000 --orders 3300000
+
+The same options and --seed always produce the same data. Rows are written
+with multi-row INSERTs in batches of --batch-size, and the seller sales
+totals, catalog version and planner statistics are refreshed at the end.
+Generated accounts are named ``loadtest-buyer-N@example.com`` and
+``loadtest-seller-N@example.com``, all with the password LOADTEST_PASSWORD.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from auth import hash_password
+from catalog_cache import catalog_version_update
+from database import engine, init_db
+from models import Order, OrderItem, OrderStatus, Product, User, UserRole
+from sales_stats import rebuild_sales_summary
+from search import drop_search_index, init_search_index
+
+LOADTEST_PASSWORD = "loadtest@123"
+LOADTEST_EMAIL_DOMAIN = "example.com"
+
+# Product names are "<adjective> <material> <noun>", which gives search
+# terms with a realistic spread of match counts
+ADJECTIVES = [
+    "Classic", "Compact", "Deluxe", "Durable", "Ergonomic", "Essential", "Portable",
+    "Premium", "Rugged", "Slim", "Smart", "Vintage", "Wireless", "Lightweight",
+]
+MATERIALS = [
+    "Aluminum", "Bamboo", "Canvas", "Ceramic", "Cotton", "Glass", "Leather",
+    "Linen", "Oak", "Rubber", "Silicone", "Steel", "Wool",
+]
+NOUNS = [
+    "Backpack", "Blender", "Bottle", "Chair", "Desk Lamp", "Headphones", "Jacket",
+    "Kettle", "Keyboard", "Mat", "Mouse", "Mug", "Notebook", "Organizer", "Pan",
+    "Pillow", "Speaker", "Stand", "Sunglasses", "Tent", "Towel", "Wallet", "Watch",
+]
+FEATURES = [
+    "for everyday use", "with a two-year warranty", "built to last",
+    "easy to clean", "ideal for travel", "great as a gift", "in assorted colors",
+]
+
+# Words the benchmark searches for
+SEARCH_TERMS = [word.lower() for word in ADJECTIVES + MATERIALS + NOUNS]
+
+# Share of orders that end up cancelled; the rest are completed
+CANCELLED_ORDER_RATE = 0.02
+
+# Exponent of the product popularity skew: with 3, the most popular 10% of
+# products receive about half of all order items
+POPULARITY_SKEW = 3
+
+def popular_index(rng: random.Random, count: int) -> int:
+    """Pick an index in range(count), favoring low indexes."""
+    return int(count * rng.random() ** POPULARITY_SKEW)
+
+def next_id(conn, model) -> int:
+    """Get the first unused primary key of a table."""
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def insert_batches(model, rows, batch_size: int) -> int:
+    """
+    Insert rows from an iterator, one transaction per batch.
+
+    Args:
+        model: Model whose table receives the rows
+        rows: Iterator of row dictionaries
+        batch_size: Rows per INSERT
+
+    Returns:
+        Number of rows inserted
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                conn.execute(insert(model), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(insert(model), batch)
+        count += len(batch)
+    return count
+
+def generate_users(role: UserRole, first_id: int, count: int, password_hash: str, created_at: datetime):
+    """Yield user rows with sequential, role-specific email addresses."""
+    for n in range(count):
+        yield {
+            "id": first_id + n,
+            "email": f"loadtest-{role.value}-{n + 1}@{LOADTEST_EMAIL_DOMAIN}",
+            "password_hash": password_hash,
+            "role": role,
+            "created_at": created_at,
+        }
+
+def generate_products(rng: random.Random, first_id: int, count: int, seller_ids: list,
+                      start: datetime, end: datetime, prices: list):
+    """Yield product rows, appending each price to ``prices`` for the order generator."""
+    if count == 0:
+        return
+    span = (end - start).total_seconds()
+    # Creation times increase with the id, as they do for real listings
+    step = span / count
+    for n in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(MATERIALS)} {rng.choice(NOUNS)}"
+        price = round(min(rng.lognormvariate(7.5, 1.0), 500000.0), 2)
+        prices.append(price)
+        created_at = start + timedelta(seconds=n * step)
+        yield {
+            "id": first_id + n,
+            "seller_id": rng.choice(seller_ids),
+            "name": name,
+            "description": f"{name} {rng.choice(FEATURES)}, {rng.choice(FEATURES)}.",
+            "price": price,
+            "stock": rng.randint(100, 10000),
+            "image_url": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+def generate_orders(rng: random.Random, first_order_id: int, first_item_id: int, count: int,
+                    buyer_ids: list, first_product_id: int, prices: list, max_items: int,
+                    start: datetime, end: datetime, batch_size: int):
+    """
+    Yield (order rows, order item rows) batches of at most ``batch_size`` orders.
+
+    Orders are spread over [start, end) in id order, each holding 1 to
+    ``max_items`` distinct products picked with a popularity skew. Yields
+    nothing without orders or products to order.
+    """
+    if count == 0 or not prices:
+        return
+    span = (end - start).total_seconds()
+    step = span / count
+    item_id = first_item_id
+    for batch_start in range(0, count, batch_size):
+        orders = []
+        items = []
+        for n in range(batch_start, min(batch_start + batch_size, count)):
+            order_id = first_order_id + n
+            indexes = {popular_index(rng, len(prices)) for _ in range(rng.randint(1, max_items))}
+            total_amount = 0.0
+            for index in sorted(indexes):
+                quantity = 1 if rng.random() < 0.8 else rng.randint(2, 5)
+                price = prices[index]
+                total_amount += price * quantity
+                items.append({
+                    "id": item_id,
+                    "order_id": order_id,
+                    "product_id": first_product_id + index,
+                    "quantity": quantity,
+                    "price": price,
+                })
+                item_id += 1
+            cancelled = rng.random() < CANCELLED_ORDER_RATE
+            orders.append({
+                "id": order_id,
+                "buyer_id": rng.choice(buyer_ids),
+                "total_amount": round(total_amount, 2),
+                "status": OrderStatus.CANCELLED if cancelled else OrderStatus.COMPLETED,
+                "created_at": start + timedelta(seconds=n * step + rng.random() * step),
+            })
+        yield orders, items
+
+def reset_sequences(conn):
+    """Move PostgreSQL id sequences past the explicitly inserted ids."""
+    for model in (User, Product, Order, OrderItem):
+        table_name = model.__tablename__
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {table_name}))"
+        ))
+
+def generate_dataset(sellers: int, buyers: int, products: int, orders: int, max_items: int,
+                     days: int, seed: int, batch_size: int):
+    """
+    Add a synthetic dataset to the database.
+
+    Args:
+        sellers: Seller accounts to create
+        buyers: Buyer accounts to create
+        products: Products to create
+        orders: Orders to create
+        max_items: Maximum distinct products per order
+        days: Days of history the products and orders are spread over
+        seed: Random seed
+        batch_size: Rows per INSERT
+
+    Raises:
+        ValueError: If the database already holds a generated dataset
+    """
+    rng = random.Random(seed)
+    end = datetime.utcnow().replace(microsecond=0)
+    start = end - timedelta(days=days)
+
+    with engine.connect() as conn:
+        existing = conn.execute(
+            select(func.count()).select_from(User).where(User.email.like(f"loadtest-%@{LOADTEST_EMAIL_DOMAIN}"))
+        ).scalar()
+        first_user_id = next_id(conn, User)
+        first_product_id = next_id(conn, Product)
+        first_order_id = next_id(conn, Order)
+        first_item_id = next_id(conn, OrderItem)
+    if existing:
+        raise ValueError(f"Database already has {existing} generated users; reset it before generating again")
+
+    def timed(label, func, *args):
+        began = time.perf_counter()
+        count = func(*args)
+        elapsed = time.perf_counter() - began
+        print(f"[OK] {label}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    # One hash for every account keeps generation fast while logins still
+    # pay the real bcrypt cost
+    password_hash = hash_password(LOADTEST_PASSWORD)
+    seller_ids = list(range(first_user_id, first_user_id + sellers))
+    buyer_ids = list(range(first_user_id + sellers, first_user_id + sellers + buyers))
+    timed("Sellers", insert_batches, User,
+          generate_users(UserRole.SELLER, seller_ids[0], sellers, password_hash, start), batch_size)
+    timed("Buyers", insert_batches, User,
+          generate_users(UserRole.BUYER, buyer_ids[0], buyers, password_hash, start), batch_size)
+
+    # Index all new products at once rather than with a trigger per row
+    drop_search_index(engine)
+    prices = []
+    timed("Products", insert_batches, Product,
+          generate_products(rng, first_product_id, products, seller_ids, start, end, prices), batch_size)
+    began = time.perf_counter()
+    init_search_index(engine)
+    print(f"[OK] Search index rebuilt in {time.perf_counter() - began:.1f}s")
+
+    def insert_orders():
+        item_count = 0
+        # Batches are counted in order items, at most max_items per order
+        for order_rows, item_rows in generate_orders(
+            rng, first_order_id, first_item_id, orders, buyer_ids, first_product_id,
+            prices, max_items, start, end, max(batch_size // max_items, 1)
+        ):
+            with engine.begin() as conn:
+                conn.execute(insert(Order), order_rows)
+                conn.execute(insert(OrderItem), item_rows)
+            item_count += len(item_rows)
+        print(f"     {orders:,} orders with {item_count:,} order items")
+        return orders + item_count
+    if products and orders:
+        timed("Orders and order items", insert_orders)
+
+    began = time.perf_counter()
+    rebuild_sales_summary()
+    with engine.begin() as conn:
+        conn.execute(catalog_version_update())
+        if conn.dialect.name == "postgresql":
+            reset_sequences(conn)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Refresh planner statistics so benchmarks see realistic query plans
+        conn.execute(text("ANALYZE"))
+    print(f"[OK] Sales totals and statistics refreshed in {time.perf_counter() - began:.1f}s")
+
+def main():
+    """Parse options and generate the dataset."""
+    parser = argparse.ArgumentParser(description="Bulk-load a synthetic dataset for load testing")
+    parser.add_argument("--sellers", type=int, default=100)
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--max-items", type=int, default=5, help="maximum distinct products per order")
+    parser.add_argument("--days", type=int, default=365, help="days of order history")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT")
+    args = parser.parse_args()
+    if min(args.sellers, args.buyers, args.max_items, args.days, args.batch_size) < 1:
+        parser.error("--sellers, --buyers, --max-items, --days and --batch-size must be at least 1")
+    if min(args.products, args.orders) < 0:
+        parser.error("--products and --orders cannot be negative")
+
+    init_db()
+    try:
+        generate_dataset(
+            args.sellers, args.buyers, args.products, args.orders, args.max_items,
+            args.days, args.seed, args.batch_size
+        )
+    except ValueError as e:
+        parser.exit(1, f"Error: {e}\n")
+    print(f"Password for all generated accounts: {LOADTEST_PASSWORD}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+HTTP conditional request helpers (ETag, Last-Modified, 304 responses).
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response, status
+
+# Catalog responses may be stored but must be revalidated before reuse,
+# so stock changes show up immediately while unchanged pages cost a 304
+CATALOG_CACHE_CONTROL = "public, no-cache"
+
+def weak_etag(*parts) -> str:
+    """Build a weak ETag from the given parts."""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Format a naive UTC datetime as an HTTP date."""
+    if value is None:
+        return None
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison.
+
+    Args:
+        if_none_match: Header value sent by the client
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+def is_conditional(request: Request) -> bool:
+    """Check whether a request carries If-None-Match or If-Modified-Since."""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Decide whether a conditional GET can be answered with 304.
+
+    If-None-Match takes precedence; If-Modified-Since is only used when the
+    client sent no ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+        last_modified: Last modification time of the resource (naive UTC)
+
+    Returns:
+        True if the client's cached copy is still valid
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def cache_headers(etag: str, last_modified: Optional[datetime], cache_control: str = CATALOG_CACHE_CONTROL) -> dict:
+    """Build the validator and Cache-Control headers for a response."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+def not_modified_response(headers: dict) -> Response:
+    """Build an empty 304 response carrying the given headers."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
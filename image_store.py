@@ -0,0 +1,150 @@
+"""
+Content-addressed blob store for product images.
+
+Uploaded Base64 images are decoded once and written to disk under their
+SHA-256 digest, so the products table only keeps a short URL reference.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+# Directory holding image blobs (one sub-directory per hash prefix)
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "./image_store")
+
+# URL prefix served by routes/image_routes.py
+IMAGE_URL_PREFIX = "/api/images/"
+
+# Same limit the frontend enforces before upload
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Supported image types and the file extension used for each
+CONTENT_TYPES = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+EXTENSION_TYPES = {ext: content_type for content_type, ext in CONTENT_TYPES.items()}
+
+DATA_URL_PATTERN = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+);base64,(?P<data>.*)$", re.DOTALL)
+BLOB_NAME_PATTERN = re.compile(r"^(?P<digest>[0-9a-f]{64})\.(?P<ext>[a-z]+)$")
+
+def is_data_url(value: Optional[str]) -> bool:
+    """Return True if the value is an inline ``data:`` URL."""
+    return bool(value) and value.startswith("data:")
+
+def blob_path(name: str) -> str:
+    """
+    Get the on-disk path of a blob.
+
+    Args:
+        name: Blob name in the form ``<sha256>.<ext>``
+
+    Returns:
+        Absolute path of the blob file
+    """
+    return os.path.abspath(os.path.join(IMAGE_STORE_DIR, name[:2], name))
+
+def parse_blob_name(name: str) -> Optional[tuple]:
+    """
+    Validate a blob name.
+
+    Args:
+        name: Blob name taken from a request path
+
+    Returns:
+        Tuple of (digest, content type), or None if the name is invalid
+    """
+    match = BLOB_NAME_PATTERN.match(name)
+    if not match or match.group("ext") not in EXTENSION_TYPES:
+        return None
+    return match.group("digest"), EXTENSION_TYPES[match.group("ext")]
+
+def save_data_url(data_url: str) -> str:
+    """
+    Decode a Base64 data URL and store it in the blob store.
+
+    Args:
+        data_url: Image encoded as ``data:<type>;base64,<payload>``
+
+    Returns:
+        URL reference to store in ``Product.image_url``
+
+    Raises:
+        ValueError: If the data URL is malformed, too large or not a supported image
+    """
+    match = DATA_URL_PATTERN.match(data_url)
+    if not match:
+        raise ValueError("Invalid image data URL")
+
+    content_type = match.group("type").lower()
+    if content_type not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported image type: {content_type}")
+
+    try:
+        data = base64.b64decode(match.group("data"), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid Base64 image data")
+
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError("Image too large. Maximum size is 5MB")
+
+    name = f"{hashlib.sha256(data).hexdigest()}.{CONTENT_TYPES[content_type]}"
+    path = blob_path(name)
+
+    # Identical content maps to the same file, so existing blobs are reused
+    if not os.path.exists(path):
+        write_blob(path, data)
+
+    return IMAGE_URL_PREFIX + name
+
+def write_blob(path: str, data: bytes):
+    """
+    Write a blob atomically, so readers never see a partial file.
+
+    Concurrent uploads of the same image each write their own temporary
+    file; whichever rename lands last wins, and all of them hold the same
+    bytes.
+
+    Args:
+        path: Destination path from blob_path
+        data: Blob content
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o644)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # e.g. Windows refusing to replace a blob being served; the
+            # destination already holds the same content
+            if not os.path.exists(path):
+                raise
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def store_image_url(image_url: Optional[str]) -> Optional[str]:
+    """
+    Move inline images into the blob store, leaving other URLs untouched.
+
+    Args:
+        image_url: Image URL as submitted by the client
+
+    Returns:
+        Value to persist in ``Product.image_url``
+    """
+    if is_data_url(image_url):
+        return save_data_url(image_url)
+    return image_url
@@ -0,0 +1,208 @@
+"""
+Durable background job queue stored in the application database.
+
+Jobs are inserted in the same transaction as the change that caused them,
+so a job exists if and only if that change committed. Worker processes
+(``python worker.py``) claim due jobs with a lease, run the registered
+handler and delete the job on success. Failed jobs are retried with
+exponential backoff and moved to ``dead_jobs`` after JOB_MAX_ATTEMPTS.
+A worker that dies mid-job loses its lease after JOB_LEASE_SECONDS and the
+job runs again, so handlers must be safe to repeat. Database errors in the
+worker loop itself (a locked SQLite file, a dropped connection, a schema
+not migrated yet) are logged and retried with backoff instead of stopping
+the worker.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from database import SessionLocal
+from models import DeadJob, Job
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "1"))
+JOB_ERROR_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_ERROR_BACKOFF_MAX_SECONDS", "60"))
+
+# Due jobs a worker tries to claim per poll before giving up to other workers
+JOB_CLAIM_CANDIDATES = 10
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> handler(db, payload)
+handlers: Dict[str, Callable] = {}
+
+def job_handler(kind: str):
+    """Register a function as the handler for a job kind."""
+    def register(func):
+        handlers[kind] = func
+        return func
+    return register
+
+def enqueue(db, kind: str, payload: dict, delay_seconds: float = 0):
+    """
+    Add a job to the current transaction.
+
+    Works with both sync and async sessions; the job becomes visible to
+    workers when the transaction commits.
+
+    Args:
+        db: Database session
+        kind: Registered job kind
+        payload: JSON-serializable job arguments
+        delay_seconds: Optional delay before the job may run
+    """
+    db.add(Job(
+        kind=kind,
+        payload=json.dumps(payload),
+        run_at=datetime.utcnow() + timedelta(seconds=delay_seconds)
+    ))
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after ``attempts`` failures."""
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+
+def claim_job(db, worker_id: str) -> Optional[Job]:
+    """
+    Claim the job that has been due the longest.
+
+    Claims are conditional updates, so concurrent workers never run the
+    same job while its lease is held.
+
+    Args:
+        db: Sync database session
+        worker_id: Name recorded on the claimed job
+
+    Returns:
+        The claimed job, or None if no job is due
+    """
+    now = datetime.utcnow()
+    available = or_(
+        Job.locked_at.is_(None),
+        Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS)
+    )
+    candidates = db.execute(
+        select(Job.id)
+        .where(Job.run_at <= now, available)
+        .order_by(Job.run_at, Job.id)
+        .limit(JOB_CLAIM_CANDIDATES)
+    ).scalars().all()
+
+    for job_id in candidates:
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, available)
+            .values(locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(Job, job_id)
+    return None
+
+def run_job(db, job: Job) -> bool:
+    """
+    Run a claimed job and record the outcome.
+
+    Handlers may commit intermediate steps; whatever they leave
+    uncommitted is committed together with the job's deletion.
+
+    Args:
+        db: Sync database session
+        job: Job returned by claim_job
+
+    Returns:
+        True if the job succeeded
+    """
+    handler = handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        handler(db, json.loads(job.payload))
+        db.delete(job)
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.id, job.kind, job.attempts)
+        record_failure(db, job, error)
+        return False
+
+def record_failure(db, job: Job, error: str):
+    """Schedule a retry with backoff, or move the job to dead_jobs."""
+    if job.attempts >= JOB_MAX_ATTEMPTS:
+        db.add(DeadJob(
+            job_id=job.id,
+            kind=job.kind,
+            payload=job.payload,
+            attempts=job.attempts,
+            last_error=error,
+            created_at=job.created_at
+        ))
+        db.delete(job)
+        logger.error("Job %s (%s) moved to dead_jobs after %s attempts", job.id, job.kind, job.attempts)
+    else:
+        job.run_at = datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = error
+    db.commit()
+
+def error_backoff(failures: int) -> float:
+    """Seconds to wait after ``failures`` consecutive database errors in the worker loop."""
+    return min(JOB_POLL_INTERVAL_SECONDS * 2 ** (failures - 1), JOB_ERROR_BACKOFF_MAX_SECONDS)
+
+def run_worker(once: bool = False, stop: Optional[threading.Event] = None) -> int:
+    """
+    Process jobs until stopped.
+
+    A database error while claiming a job or recording its outcome is
+    logged and retried after error_backoff(); a job whose outcome was not
+    recorded runs again once its lease expires.
+
+    Args:
+        once: Return as soon as no job is due, or on a database error,
+            instead of polling
+        stop: Event that ends the loop when set
+
+    Returns:
+        Number of jobs processed
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    processed = 0
+    failures = 0
+
+    while not stop.is_set():
+        try:
+            with SessionLocal() as db:
+                job = claim_job(db, worker_id)
+                if job is not None:
+                    run_job(db, job)
+                    processed += 1
+        except SQLAlchemyError as error:
+            if once:
+                logger.warning("Job queue database error, stopping: %s", error)
+                break
+            failures += 1
+            delay = error_backoff(failures)
+            logger.warning("Job queue database error, retrying in %.1f s: %s", delay, error)
+            stop.wait(delay)
+            continue
+
+        failures = 0
+        if job is not None:
+            continue
+        if once:
+            break
+        stop.wait(JOB_POLL_INTERVAL_SECONDS)
+
+    return processed
@@ -1,11 +1,24 @@
 """
 Main FastAPI application for the e-commerce platform.
+
+Server processes do no database setup when they start. Create and migrate
+the schema once per deploy, and optionally load the demo data:
+    python migrations.py
+    python seed_data.py
 """
+import os
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db
-from routes import auth_routes, product_routes, order_routes
+from auth import shutdown_password_executor
+import slow_queries
+from metrics import MetricsMiddleware
+from profiling import PROFILING_ENABLED
+from static_assets import PrecompressedStaticFiles
+from routes import auth_routes, product_routes, order_routes, image_routes, health_routes, metrics_routes
+
+# Set to 1 on hosts with no separate setup step (e.g. serverless) to create
+# and migrate the schema as each process starts
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "0").lower() in ("1", "true")
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,27 +36,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record latency, status codes and SQL time per route for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Profile requests on demand (outermost, to cover the whole request); the
+# middleware and the download routes are not loaded at all unless
+# PROFILE_TOKEN or PROFILE_SAMPLE_RATE is set
+if PROFILING_ENABLED:
+    from profiling import ProfilingMiddleware
+    from routes import profile_routes
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(profile_routes.router)
+
 # Include routers
+app.include_router(health_routes.router)
+app.include_router(metrics_routes.router)
 app.include_router(auth_routes.router)
 app.include_router(product_routes.router)
 app.include_router(order_routes.router)
+app.include_router(image_routes.router)
 
-# Mount static files
-app.mount("/", StaticFiles(directory="static", html=True), name="static")
+# Mount static files (fingerprinted and precompressed on first use)
+app.mount("/", PrecompressedStaticFiles(directory="static", html=True), name="static")
 
 @app.on_event("startup")
 def startup_event():
-    """Initialize database on startup."""
-    init_db()
-    print("Database initialized successfully!")
-    
-    # Seed database with initial data
-    try:
-        from seed_data import seed_database
-        seed_database()
-    except Exception as e:
-        print(f"Note: Database seeding skipped or failed: {e}")
+    """Open the slow-query log, and initialize the database if DB_INIT_ON_STARTUP is set."""
+    # A log path that cannot be written is reported here, once, and disables the log
+    slow_queries.start()
+    if DB_INIT_ON_STARTUP:
+        from database import init_db
+        init_db()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Release background workers on shutdown."""
+    shutdown_password_executor()
+    slow_queries.shutdown()
 
 if __name__ == "__main__":
+    # Local development: set up and seed the database, then serve
     import uvicorn
+    from database import init_db
+    from seed_data import seed_database
+    init_db()
+    seed_database()
     uvicorn.run(app, host="0.0.0.0", port=8001)
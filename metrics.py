@@ -0,0 +1,215 @@
+"""
+Request and database metrics in the Prometheus text exposition format.
+
+MetricsMiddleware records every HTTP request's latency, status code and
+the number and duration of the SQL statements it ran, labelled by route
+template (``/api/products/{product_id}``), so label values stay bounded.
+database.py times every statement with cursor event hooks and reports it
+through observe_query. In-process caches registered with register_cache
+report their hit, miss and eviction counters. ``GET /metrics`` renders the
+registry.
+
+Metrics are kept per process: with several uvicorn workers each scrape
+reads whichever worker answers, so scrape every worker or run one per
+container.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label for requests no API route matched (static files, 404s) and
+# for statements run outside any request (startup, scripts)
+OTHER_ROUTE = "other"
+NO_ROUTE = "none"
+
+class RequestStats:
+    """SQL statements run while handling one request."""
+    __slots__ = ("scope", "queries", "query_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_seconds = 0.0
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+class MetricsRegistry:
+    """Counters and histograms for requests and SQL statements."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.in_flight = 0
+        # (method, route, status) -> count
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        # (method, route) -> [bucket counts..., +Inf count, sum]
+        self.latency: Dict[Tuple[str, str], list] = {}
+        # (method, route) -> [statement count, seconds]
+        self.queries: Dict[Tuple[str, str], list] = {}
+        # cache label -> cache.TTLCache
+        self.caches: Dict[str, object] = {}
+
+    def register_cache(self, name: str, cache):
+        """
+        Export a cache's counters, labelled ``cache="<name>"``.
+
+        Args:
+            name: Cache label
+            cache: Cache with a stats() method, such as cache.TTLCache
+        """
+        with self.lock:
+            self.caches[name] = cache
+
+    def observe_request(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats):
+        """Record a finished request and the SQL it ran."""
+        key = (method, route)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self.lock:
+            request_key = (method, route, str(status_code))
+            self.requests[request_key] = self.requests.get(request_key, 0) + 1
+
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            histogram[bucket] += 1
+            histogram[-1] += seconds
+
+            if stats.queries:
+                totals = self.queries.setdefault(key, [0, 0.0])
+                totals[0] += stats.queries
+                totals[1] += stats.query_seconds
+
+    def observe_query(self, seconds: float):
+        """Record a SQL statement, attributing it to the current request if there is one."""
+        stats = current_request.get()
+        if stats is not None:
+            # Only the request's own task touches its stats
+            stats.queries += 1
+            stats.query_seconds += seconds
+            return
+        with self.lock:
+            totals = self.queries.setdefault(("", NO_ROUTE), [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def render(self) -> str:
+        """Render every metric in the text exposition format."""
+        lines = [
+            "# HELP process_start_time_seconds Start time of the process since the Unix epoch.",
+            "# TYPE process_start_time_seconds gauge",
+            f"process_start_time_seconds {self.started_at:.3f}",
+            "# HELP http_requests_in_flight HTTP requests currently being handled.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        with self.lock:
+            requests = sorted(self.requests.items())
+            latency = sorted((key, list(values)) for key, values in self.latency.items())
+            queries = sorted((key, list(values)) for key, values in self.queries.items())
+            caches = sorted(self.caches.items())
+
+        lines += [
+            "# HELP http_requests_total HTTP requests by method, route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status_code), count in requests:
+            lines.append(f"http_requests_total{labels(method=method, route=route, status=status_code)} {count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds HTTP request latency by method and route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in latency:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram):
+                cumulative += count
+                lines.append(
+                    f"http_request_duration_seconds_bucket{labels(method=method, route=route, le=str(bound))} {cumulative}"
+                )
+            lines.append(f"http_request_duration_seconds_sum{labels(method=method, route=route)} {histogram[-1]:.6f}")
+            lines.append(f"http_request_duration_seconds_count{labels(method=method, route=route)} {cumulative}")
+
+        lines += [
+            "# HELP db_queries_total SQL statements executed, by the request route that ran them.",
+            "# TYPE db_queries_total counter",
+        ]
+        lines += [f"db_queries_total{labels(method=method, route=route)} {count}" for (method, route), (count, _) in queries]
+        lines += [
+            "# HELP db_query_duration_seconds_total Time spent executing SQL statements, by request route.",
+            "# TYPE db_query_duration_seconds_total counter",
+        ]
+        lines += [
+            f"db_query_duration_seconds_total{labels(method=method, route=route)} {seconds:.6f}"
+            for (method, route), (_, seconds) in queries
+        ]
+
+        cache_stats = [(name, cache.stats()) for name, cache in caches]
+        for metric, stat, metric_type, help_text in (
+            ("cache_hits_total", "hits", "counter", "Cache lookups that found a fresh entry."),
+            ("cache_misses_total", "misses", "counter", "Cache lookups that found no entry or an expired one."),
+            ("cache_evictions_total", "evictions", "counter", "Entries evicted to stay within the cache's size limit."),
+            ("cache_entries", "size", "gauge", "Entries currently held by the cache."),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}"]
+            lines += [f"{metric}{labels(cache=name)} {values[stat]}" for name, values in cache_stats]
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+def labels(**values) -> str:
+    """Format label values, escaped as the exposition format requires."""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in values.items()) + "}"
+
+def escape_label(value: str) -> str:
+    """Escape backslashes, double quotes and newlines in a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def route_label(scope) -> str:
+    """Get the path template of the route that handled a request."""
+    return getattr(scope.get("route"), "path_format", None) or OTHER_ROUTE
+
+def current_route() -> Tuple[str, str]:
+    """Get the (method, route) labels of the request being handled, if any."""
+    stats = current_request.get()
+    if stats is None:
+        return "", NO_ROUTE
+    return stats.scope["method"], route_label(stats.scope)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status code and SQL time of each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Unhandled exceptions are answered with 500 by the outer error middleware
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        registry.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            registry.in_flight -= 1
+            current_request.reset(token)
+            registry.observe_request(scope["method"], route_label(scope), status_code, elapsed, stats)
@@ -0,0 +1,58 @@
+"""
+One-shot migration moving Base64 product images into the image store.
+
+Run once after upgrading:
+    python migrate_images.py
+"""
+from database import SessionLocal
+from models import Product
+from image_store import is_data_url, store_image_url
+from catalog_cache import catalog_version_update
+
+BATCH_SIZE = 50
+
+def migrate_images():
+    """Replace Base64 ``image_url`` values with image store references."""
+    db = SessionLocal()
+
+    try:
+        # Only load ids up front so large Base64 rows are read one batch at a time
+        product_ids = [
+            row.id for row in db.query(Product.id).filter(Product.image_url.like("data:%"))
+        ]
+        if not product_ids:
+            print("No Base64 product images found. Nothing to migrate.")
+            return
+
+        print(f"Migrating {len(product_ids)} product images...")
+        migrated = 0
+        failed = 0
+
+        for start in range(0, len(product_ids), BATCH_SIZE):
+            batch_ids = product_ids[start:start + BATCH_SIZE]
+            products = db.query(Product).filter(Product.id.in_(batch_ids)).all()
+
+            for product in products:
+                if not is_data_url(product.image_url):
+                    continue
+                try:
+                    product.image_url = store_image_url(product.image_url)
+                    migrated += 1
+                except ValueError as e:
+                    print(f"Skipping product {product.id}: {e}")
+                    failed += 1
+
+            db.execute(catalog_version_update())
+            db.commit()
+            db.expunge_all()
+
+        print(f"[OK] Migrated {migrated} images ({failed} skipped)")
+
+    except Exception as e:
+        print(f"Error migrating images: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    migrate_images()
@@ -0,0 +1,117 @@
+"""
+Versioned schema migrations.
+
+``Base.metadata.create_all`` only creates missing tables, so changes to
+existing tables (new columns, new indexes) are applied here. Each migration
+runs once per database and is recorded in the ``schema_migrations`` table.
+
+Run pending migrations with:
+    python migrations.py
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from database import engine
+from models import CatalogState, Order, OrderItem, Product
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+def add_column_if_missing(conn, table, column):
+    """
+    Add a model-declared column to an existing table.
+
+    Args:
+        conn: Connection inside the migration transaction
+        table: Table object from the models
+        column: Name of the column to add
+
+    Returns:
+        True if the column was added, False if it already existed
+    """
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    if column in existing:
+        return False
+    column_type = table.c[column].type.compile(dialect=conn.dialect)
+    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column} {column_type}"))
+    return True
+
+def create_indexes(conn, table, names):
+    """Create the model-declared indexes with the given names if they are missing."""
+    for index in table.indexes:
+        if index.name in names:
+            index.create(bind=conn, checkfirst=True)
+
+def add_hot_filter_indexes(conn):
+    """Index the foreign keys used by seller, buyer and order item listings."""
+    create_indexes(conn, OrderItem.__table__, {"ix_order_items_order_id", "ix_order_items_product_id"})
+    create_indexes(conn, Order.__table__, {"ix_orders_buyer_id_created_at"})
+    create_indexes(conn, Product.__table__, {"ix_products_seller_id_created_at"})
+
+def add_product_updated_at(conn):
+    """Add products.updated_at for HTTP caching and seed the catalog version row."""
+    if add_column_if_missing(conn, Product.__table__, "updated_at"):
+        conn.execute(text("UPDATE products SET updated_at = created_at"))
+
+    catalog_state = CatalogState.__table__
+    if conn.execute(select(catalog_state.c.id)).first() is None:
+        conn.execute(catalog_state.insert().values(id=1, version=0, updated_at=datetime.utcnow()))
+
+def add_catalog_stock_version(conn):
+    """Add catalog_state.stock_version, so stock changes no longer bump the catalog version."""
+    if add_column_if_missing(conn, CatalogState.__table__, "stock_version"):
+        conn.execute(text("UPDATE catalog_state SET stock_version = 0"))
+
+def add_catalog_listing_index(conn):
+    """Index (created_at, id), the sort key of the public catalog listing."""
+    create_indexes(conn, Product.__table__, {"ix_products_created_at_id"})
+
+# Ordered list of (version, name, function). Append new migrations at the end
+# and never change or reorder applied ones.
+MIGRATIONS = [
+    (1, "add_hot_filter_indexes", add_hot_filter_indexes),
+    (2, "add_product_updated_at", add_product_updated_at),
+    (3, "add_catalog_stock_version", add_catalog_stock_version),
+    (4, "add_catalog_listing_index", add_catalog_listing_index),
+]
+
+# Version of a fully migrated database
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def run_migrations(bind=engine):
+    """
+    Apply all pending migrations, each in its own transaction.
+
+    Migrations must be idempotent, so a worker that loses a race with
+    another worker applying the same migration simply skips it.
+
+    Args:
+        bind: Engine to migrate
+    """
+    migration_metadata.create_all(bind=bind)
+
+    with bind.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    for version, name, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                migrate(conn)
+                conn.execute(schema_migrations.insert().values(version=version, name=name))
+            print(f"[OK] Applied migration {version}: {name}")
+        except IntegrityError:
+            print(f"Migration {version} was applied by another process. Skipping.")
+
+if __name__ == "__main__":
+    from database import init_db
+    init_db()
+    print(f"[OK] Database schema is at version {SCHEMA_VERSION}")
@@ -1,7 +1,7 @@
 """
 Database models for the e-commerce application.
 """
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, DateTime, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -36,6 +36,12 @@ class User(Base):
 class Product(Base):
     """Product model for items listed by sellers."""
     __tablename__ = "products"
+    __table_args__ = (
+        # Seller listings filter by seller and page by (created_at, id)
+        Index("ix_products_seller_id_created_at", "seller_id", "created_at"),
+        # The public catalog pages by (created_at, id) across all products
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -43,8 +49,9 @@ class Product(Base):
     description = Column(String)
     price = Column(Float, nullable=False)
     stock = Column(Integer, default=0)
-    image_url = Column(Text)  # Changed to Text to support Base64 encoded images
+    image_url = Column(Text)  # Image store reference or external URL
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     seller = relationship("User", back_populates="products")
@@ -53,6 +60,10 @@ class Product(Base):
 class Order(Base):
     """Order model for buyer purchases."""
     __tablename__ = "orders"
+    __table_args__ = (
+        # Buyer order history filters by buyer and pages by (created_at, id)
+        Index("ix_orders_buyer_id_created_at", "buyer_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     buyer_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -69,11 +80,80 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)  # Price at time of purchase
     
     # Relationships
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
+
+class CatalogState(Base):
+    """Single-row table whose versions change whenever any product changes."""
+    __tablename__ = "catalog_state"
+    
+    id = Column(Integer, primary_key=True)
+    # Changes when products are created, edited or deleted
+    version = Column(Integer, nullable=False, default=0)
+    # Changes when only stock levels change (checkouts, inventory sync)
+    stock_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class ProductDailySales(Base):
+    """Sales totals per product per day (UTC), updated as orders are placed."""
+    __tablename__ = "product_daily_sales"
+    __table_args__ = (
+        # Seller stats sum a seller's rows over a range of days
+        Index("ix_product_daily_sales_seller_id_day", "seller_id", "day"),
+    )
+    
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    seller_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    revenue = Column(Float, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)  # Orders containing the product
+
+class SellerDailySales(Base):
+    """Sales totals per seller per day (UTC), updated as orders are placed."""
+    __tablename__ = "seller_daily_sales"
+    
+    seller_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)  # Orders containing any of the seller's products
+
+class Job(Base):
+    """Queued background job; deleted once it succeeds."""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the job that has been due the longest
+        Index("ix_jobs_run_at", "run_at"),
+        # Never reuse ids of deleted jobs, so dead_jobs.job_id stays unique
+        {"sqlite_autoincrement": True},
+    )
+    
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    attempts = Column(Integer, nullable=False, default=0)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = Column(String)  # Worker running the job
+    locked_at = Column(DateTime)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class DeadJob(Base):
+    """Job that failed on every attempt, kept for inspection."""
+    __tablename__ = "dead_jobs"
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    failed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,70 @@
+"""
+Order post-processing run by the job queue after checkout.
+
+create_order only reserves stock and records the order; everything that
+can happen later (status changes, confirmation email, seller notifications)
+runs in a worker so it never adds to checkout latency.
+"""
+import logging
+from sqlalchemy import select, update
+from jobs import enqueue, job_handler
+from models import Order, OrderItem, OrderStatus, Product, User
+
+ORDER_PLACED = "order.placed"
+
+logger = logging.getLogger(__name__)
+
+def enqueue_order_placed(db, order_id: int):
+    """Queue post-processing for an order in the current transaction."""
+    enqueue(db, ORDER_PLACED, {"order_id": order_id})
+
+def send_order_confirmation(order: Order, buyer_email: str):
+    """Send the buyer an order confirmation. Replace the log line with a mailer."""
+    logger.info("Order %s confirmed for %s (total %.2f)", order.id, buyer_email, order.total_amount)
+
+def notify_sellers(order: Order, seller_emails: list):
+    """Tell each seller that an order contains their products."""
+    for email in seller_emails:
+        logger.info("Order %s contains products sold by %s", order.id, email)
+
+@job_handler(ORDER_PLACED)
+def process_order(db, payload: dict):
+    """
+    Move an order PENDING -> PROCESSING -> COMPLETED, sending notifications in between.
+
+    Safe to repeat: a retried job finds the order already PROCESSING and
+    continues from there, and a completed order is left alone.
+
+    Args:
+        db: Sync database session
+        payload: Job payload with ``order_id``
+    """
+    order = db.get(Order, payload["order_id"])
+    if order is None or order.status in (OrderStatus.COMPLETED, OrderStatus.CANCELLED):
+        return
+
+    if order.status == OrderStatus.PENDING:
+        db.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.PROCESSING)
+        )
+        db.commit()
+
+    buyer_email = db.execute(select(User.email).where(User.id == order.buyer_id)).scalar_one()
+    seller_emails = db.execute(
+        select(User.email)
+        .join(Product, Product.seller_id == User.id)
+        .join(OrderItem, OrderItem.product_id == Product.id)
+        .where(OrderItem.order_id == order.id)
+        .distinct()
+    ).scalars().all()
+
+    send_order_confirmation(order, buyer_email)
+    notify_sellers(order, seller_emails)
+
+    db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status == OrderStatus.PROCESSING)
+        .values(status=OrderStatus.COMPLETED)
+    )
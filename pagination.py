@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Pages are ordered by a tuple of columns ending in a unique id. The cursor is
+an opaque token holding the sort key of the last row returned, and the next
+page starts strictly after it, so every page costs the same as the first.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    """A page of results plus the cursor for the next page (None on the last page)."""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def encode_cursor(values) -> str:
+    """
+    Encode a sort key as an opaque cursor.
+
+    Args:
+        values: Sort key values of the last row on a page
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, order_columns) -> list:
+    """
+    Decode a cursor back into typed sort key values.
+
+    Args:
+        cursor: Cursor produced by encode_cursor
+        order_columns: Columns the page is ordered by
+
+    Returns:
+        List of sort key values
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(order_columns):
+            raise ValueError("Cursor does not match ordering")
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(order_columns, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def paginate(db, stmt, order_columns, cursor: Optional[str], limit: int) -> dict:
+    """
+    Fetch one page of a select statement using keyset pagination.
+
+    Args:
+        db: Async database session
+        stmt: Select of either one entity or a set of labelled columns
+        order_columns: Sort key columns, the last one must be unique
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Maximum number of rows to return
+
+    Returns:
+        Dictionary with ``items`` (entities, or dictionaries for column
+        selects) and ``next_cursor``
+    """
+    column_count = len(stmt.column_descriptions)
+
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        stmt = stmt.where(tuple_(*order_columns) > tuple_(*values))
+
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.add_columns(*order_columns).order_by(*order_columns).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][column_count:])
+
+    if column_count == 1:
+        items = [row[0] for row in rows]
+    else:
+        items = [dict(zip(row._fields[:column_count], row[:column_count])) for row in rows]
+
+    return {"items": items, "next_cursor": next_cursor}
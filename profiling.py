@@ -0,0 +1,192 @@
+"""
+On-demand request profiling.
+
+A request is profiled when it carries ``X-Profile-Token: <PROFILE_TOKEN>``,
+or at random for a PROFILE_SAMPLE_RATE fraction of all requests. The
+profile covers the whole request (validation, dependencies such as
+auth.get_current_user, the route, SQLAlchemy and response encoding) and is
+saved under PROFILE_DIR for download from ``/api/admin/profiles``. The
+response names it in the ``X-Profile-Id`` header. A profiler hooks the
+whole thread, so a process profiles one request at a time; requests
+arriving meanwhile are served unprofiled and get no header.
+
+Uses the pyinstrument sampling profiler when installed, which writes an
+interactive HTML call tree (or a speedscope flame graph with
+PROFILE_FORMAT=speedscope) and follows the request across awaits.
+Otherwise cProfile writes a pstats dump, which also includes whatever
+other requests ran on the event loop meanwhile.
+
+With neither PROFILE_TOKEN nor PROFILE_SAMPLE_RATE set, main.py installs
+neither the middleware nor the download routes, and pyinstrument is only
+imported when the first profile starts, so profiling costs nothing when
+disabled.
+"""
+import cProfile
+import hmac
+import os
+import random
+import time
+import uuid
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+# Shared secret for triggering profiles and downloading them; unset
+# disables both
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "100"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "html")  # "html" or "speedscope"
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+
+PROFILING_ENABLED = bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+TOKEN_HEADER = "x-profile-token"
+
+# Downloads carry the token too but are not worth profiling
+PROFILE_ROUTES_PREFIX = "/api/admin/profiles"
+
+# Saved profile file extensions and their download media types
+PROFILE_MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".speedscope.json": "application/json",
+    ".pstats": "application/octet-stream",
+}
+
+def token_matches(token: Optional[str]) -> bool:
+    """
+    Check a token against PROFILE_TOKEN in constant time.
+
+    Header values are decoded as latin-1, so the token is compared as the
+    raw header bytes; compare_digest rejects str arguments with non-ASCII
+    characters.
+    """
+    if not PROFILE_TOKEN or token is None:
+        return False
+    return hmac.compare_digest(token.encode("latin-1"), PROFILE_TOKEN.encode("utf-8"))
+
+def start_profiler():
+    """
+    Start a profiler on the current thread.
+
+    Returns:
+        A pyinstrument Profiler if pyinstrument is installed, else a
+        cProfile.Profile
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    profiler = Profiler(interval=PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+    profiler.start()
+    return profiler
+
+def stop_profiler(profiler):
+    """Stop a profiler from start_profiler()."""
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+def list_profiles() -> List[str]:
+    """Names of the saved profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = [name for name in os.listdir(PROFILE_DIR) if profile_media_type(name)]
+    return sorted(names, reverse=True)
+
+def profile_media_type(name: str) -> Optional[str]:
+    """Media type of a saved profile, or None if the name is not a profile file."""
+    if "/" in name or "\\" in name or name.startswith("."):
+        return None
+    for extension, media_type in PROFILE_MEDIA_TYPES.items():
+        if name.endswith(extension):
+            return media_type
+    return None
+
+def profile_path(name: str) -> Optional[str]:
+    """Path of a saved profile, or None if there is no such profile."""
+    if profile_media_type(name) is None:
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+def save_profile(profiler, base_name: str) -> str:
+    """
+    Write a finished profile and delete the oldest beyond PROFILE_MAX_FILES.
+
+    Args:
+        profiler: Stopped pyinstrument Profiler or cProfile.Profile
+        base_name: File name without extension
+
+    Returns:
+        Name of the saved file
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    if isinstance(profiler, cProfile.Profile):
+        name = base_name + ".pstats"
+        profiler.dump_stats(os.path.join(PROFILE_DIR, name))
+    elif PROFILE_FORMAT == "speedscope":
+        from pyinstrument.renderers import SpeedscopeRenderer
+        name = base_name + ".speedscope.json"
+        with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+            f.write(profiler.output(SpeedscopeRenderer()))
+    else:
+        name = base_name + ".html"
+        with open(os.path.join(PROFILE_DIR, name), "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+
+    for old_name in list_profiles()[PROFILE_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, old_name))
+        except FileNotFoundError:
+            pass
+    return name
+
+def profile_name(scope, started_at: float, request_id: str) -> str:
+    """File name (without extension) for a request's profile: time, method and route."""
+    route = getattr(scope.get("route"), "path_format", None) or scope["path"]
+    slug = "".join(c if c.isalnum() else "_" for c in route).strip("_")[:60]
+    timestamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started_at))
+    return f"{timestamp}-{request_id}-{scope['method']}-{slug or 'root'}"
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests that ask for it or are sampled."""
+
+    def __init__(self, app):
+        self.app = app
+        # Profilers hook the whole thread, so one request is profiled at a time
+        self.busy = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.busy or scope["path"].startswith(PROFILE_ROUTES_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        requested = token_matches(Headers(scope=scope).get(TOKEN_HEADER))
+        if not requested and not (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        request_id = uuid.uuid4().hex[:8]
+
+        async def send_with_profile_id(message):
+            # Routing has matched by the time the response starts
+            if message["type"] == "http.response.start" and requested:
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Profile-Id", profile_name(scope, started_at, request_id))
+            await send(message)
+
+        self.busy = True
+        profiler = start_profiler()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            stop_profiler(profiler)
+            self.busy = False
+            # Rendering takes a while; keep it off the event loop
+            await run_in_threadpool(save_profile, profiler, profile_name(scope, started_at, request_id))
@@ -2,11 +2,12 @@
 Authentication routes for user registration and login.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from database import get_db
 from models import User, UserRole
-from auth import hash_password, verify_password, create_access_token, get_current_user
+from auth import hash_password, verify_password, create_access_token, get_current_user, run_password_task
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -33,7 +34,7 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+async def register(user_data: UserRegister, db: AsyncSession = Depends(get_db)):
     """
     Register a new user (buyer or seller).
     
@@ -45,31 +46,35 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         Created user object
         
     Raises:
-        HTTPException: If email already exists
+        HTTPException: If email already exists or the server is overloaded
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User.id).where(User.email == user_data.email))
+    existing_user = result.first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    # Return the connection to the pool before the slow hashing step
+    await db.close()
+    password_hash = await run_password_task(hash_password, user_data.password)
+    
     # Create new user
     new_user = User(
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=password_hash,
         role=user_data.role
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     return new_user
 
 @router.post("/login", response_model=Token)
-def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Login user and return JWT token.
     
@@ -81,12 +86,18 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
         JWT access token
         
     Raises:
-        HTTPException: If credentials are invalid
+        HTTPException: If credentials are invalid or the server is overloaded
     """
     # Find user by email
-    user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(
+        select(User.id, User.password_hash).where(User.email == user_data.email)
+    )
+    user = result.first()
+    
+    # Return the connection to the pool before the slow password check
+    await db.close()
     
-    if not user or not verify_password(user_data.password, user.password_hash):
+    if not user or not await run_password_task(verify_password, user_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -98,7 +109,7 @@ def login(user_data: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """
     Get current authenticated user information.
     
@@ -0,0 +1,61 @@
+"""
+Health check routes for load balancers and orchestrators.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from migrations import SCHEMA_VERSION, schema_migrations
+
+router = APIRouter(prefix="/api/health", tags=["Health"])
+
+class HealthResponse(BaseModel):
+    status: str
+
+class ReadinessResponse(BaseModel):
+    status: str
+    schema_version: int
+
+@router.get("", response_model=HealthResponse)
+async def liveness():
+    """
+    Report that the process is up, without touching the database.
+
+    Returns:
+        Status "ok"
+    """
+    return {"status": "ok"}
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness(db: AsyncSession = Depends(get_db)):
+    """
+    Report whether this process can serve requests.
+
+    Ready means the database is reachable and fully migrated.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Status "ready" and the applied schema version
+
+    Raises:
+        HTTPException: 503 if the database is unreachable or not migrated
+    """
+    try:
+        applied = await db.scalar(select(func.max(schema_migrations.c.version)))
+    except SQLAlchemyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable or not initialized; run python migrations.py"
+        )
+
+    if applied is None or applied < SCHEMA_VERSION:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Database schema is at version {applied or 0} of {SCHEMA_VERSION}; run python migrations.py"
+        )
+
+    return {"status": "ready", "schema_version": applied}
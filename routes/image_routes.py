@@ -0,0 +1,52 @@
+"""
+Product image routes serving blobs from the content-addressed image store.
+"""
+import os
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from fastapi.responses import FileResponse
+from typing import Optional
+from image_store import blob_path, parse_blob_name
+
+router = APIRouter(prefix="/api/images", tags=["Images"])
+
+# Blobs never change once written, so clients may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{name}")
+def get_image(name: str, if_none_match: Optional[str] = Header(None)):
+    """
+    Stream a stored product image.
+
+    Args:
+        name: Blob name in the form ``<sha256>.<ext>``
+        if_none_match: Optional ETag sent by the client
+
+    Returns:
+        Image bytes, or 304 if the client already has them
+
+    Raises:
+        HTTPException: If the image does not exist
+    """
+    parsed = parse_blob_name(name)
+    if parsed is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    digest, content_type = parsed
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+    # The digest is a strong validator, so a match means the bytes are identical
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = blob_path(name)
+    if not os.path.isfile(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    return FileResponse(path, media_type=content_type, headers=headers)
@@ -0,0 +1,17 @@
+"""
+Metrics endpoint for Prometheus scrapes.
+"""
+from fastapi import APIRouter, Response
+from metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """
+    Render request and database metrics in the Prometheus text format.
+
+    Returns:
+        Metrics text
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
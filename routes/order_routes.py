@@ -1,14 +1,22 @@
 """
 Order management routes.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from datetime import date, datetime, timedelta
 from pydantic import BaseModel
-from database import get_db
+from database import get_db, get_read_db
 from models import Order, OrderItem, Product, User, OrderStatus, UserRole
 from auth import get_current_user, require_buyer, require_seller
+from pagination import Page, paginate
+import catalog_cache
+import sales_stats
+import order_pipeline
+from fast_json import FastJSONResponse, response_columns
+from export import EXPORT_FORMAT_PATTERN, export_response
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
@@ -43,6 +51,24 @@ class OrderResponse(BaseModel):
             datetime: lambda v: v.isoformat() + 'Z' if v else None
         }
 
+class SalesTotals(BaseModel):
+    revenue: float
+    units: int
+    orders: int
+
+class ProductSales(SalesTotals):
+    product_id: int
+    product_name: Optional[str]
+
+class DailySales(SalesTotals):
+    day: date
+
+class SellerStatsResponse(BaseModel):
+    since: date
+    totals: SalesTotals
+    products: List[ProductSales]
+    days: List[DailySales]
+
 class SellerOrderItemResponse(BaseModel):
     id: int
     product_id: int
@@ -57,10 +83,10 @@ class SellerOrderItemResponse(BaseModel):
         from_attributes = True
 
 @router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
+async def create_order(
     order_data: OrderCreate,
     current_user: User = Depends(require_buyer),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new order (buyer only).
@@ -74,7 +100,7 @@ def create_order(
         Created order object
         
     Raises:
-        HTTPException: If product not found or insufficient stock
+        HTTPException: If product not found (404) or insufficient stock (409)
     """
     if not order_data.items:
         raise HTTPException(
@@ -82,75 +108,100 @@ def create_order(
             detail="Order must contain at least one item"
         )
     
-    total_amount = 0
-    order_items = []
-    
-    # Validate products and calculate total
+    # Merge repeated products so each one is reserved with a single update
+    quantities = {}
     for item in order_data.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        
-        if not product:
+        if item.quantity <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Item quantity must be at least 1"
+            )
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    
+    # Load every product in the order with one query
+    result = await db.execute(select(Product).where(Product.id.in_(quantities.keys())))
+    products = {product.id: product for product in result.scalars()}
+    
+    for product_id in quantities:
+        if product_id not in products:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product {item.product_id} not found"
+                detail=f"Product {product_id} not found"
             )
+    
+    # Reserve stock with conditional updates so concurrent checkouts can never
+    # oversell. Products are updated in id order to keep lock ordering stable.
+    total_amount = 0
+    order_items = []
+    
+    for product_id in sorted(quantities):
+        product = products[product_id]
+        quantity = quantities[product_id]
         
-        if product.stock < item.quantity:
+        result = await db.execute(
+            update(Product)
+            .where(Product.id == product_id, Product.stock >= quantity)
+            .values(stock=Product.stock - quantity)
+        )
+        if result.rowcount != 1:
+            # Read the name first; rollback expires every loaded product
+            product_name = product.name
+            await db.rollback()
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient stock for product {product.name}"
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock for product {product_name}"
             )
         
-        item_total = product.price * item.quantity
-        total_amount += item_total
-        
+        total_amount += product.price * quantity
         order_items.append({
-            "product_id": product.id,
-            "quantity": item.quantity,
+            "product_id": product_id,
+            "quantity": quantity,
             "price": product.price
         })
-        
-        # Update product stock
-        product.stock -= item.quantity
     
-    # Create order
+    # Create order together with its items so the response needs no reload
+    created_at = datetime.utcnow()
     new_order = Order(
         buyer_id=current_user.id,
+        created_at=created_at,
         total_amount=total_amount,
-        status=OrderStatus.PENDING
+        status=OrderStatus.PENDING,
+        items=[OrderItem(**item_data) for item_data in order_items]
     )
     
     db.add(new_order)
-    db.flush()  # Get order ID before adding items
-    
-    # Create order items
-    for item_data in order_items:
-        order_item = OrderItem(
-            order_id=new_order.id,
-            **item_data
-        )
-        db.add(order_item)
-    
-    db.commit()
-    db.refresh(new_order)
+    # Flush for the order id; the job commits atomically with the order
+    await db.flush()
+    order_pipeline.enqueue_order_placed(db, new_order.id)
+    await sales_stats.record_order(db, created_at.date(), [
+        (products[item["product_id"]].seller_id, item["product_id"], item["quantity"], item["price"])
+        for item in order_items
+    ])
+    # Stock-only change: cached catalog pages just re-read their stock
+    await catalog_cache.bump_stock_version(db)
+    await db.commit()
     
     return new_order
 
-@router.get("", response_model=List[OrderResponse])
-def get_user_orders(
+@router.get("", response_model=Page[OrderResponse])
+async def get_user_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all orders for the current user.
     Only buyers can see their own orders.
     
     Args:
+        cursor: Cursor from the previous page (pagination)
+        limit: Maximum number of orders to return
         current_user: Current authenticated user
         db: Database session
         
     Returns:
-        List of user's orders
+        Page of user's orders
     """
     if current_user.role != UserRole.BUYER:
         raise HTTPException(
@@ -158,14 +209,39 @@ def get_user_orders(
             detail="Only buyers can view their orders"
         )
     
-    orders = db.query(Order).filter(Order.buyer_id == current_user.id).all()
-    return orders
+    stmt = select(
+        Order.id,
+        Order.buyer_id,
+        Order.total_amount,
+        Order.status,
+        Order.created_at
+    ).where(Order.buyer_id == current_user.id)
+    page = await paginate(db, stmt, [Order.created_at, Order.id], cursor, limit)
+    
+    # Load items for the whole page with one extra IN query
+    items_by_order = {order["id"]: [] for order in page["items"]}
+    if items_by_order:
+        result = await db.execute(
+            select(OrderItem.order_id, *response_columns(OrderItemResponse, OrderItem))
+            .where(OrderItem.order_id.in_(items_by_order.keys()))
+            .order_by(OrderItem.id)
+        )
+        for row in result:
+            item = row._asdict()
+            items_by_order[item.pop("order_id")].append(item)
+    
+    for order in page["items"]:
+        # Same format as OrderResponse's json_encoders
+        order["created_at"] = order["created_at"].isoformat() + "Z"
+        order["items"] = items_by_order[order["id"]]
+    
+    return FastJSONResponse(page)
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
+async def get_order(
     order_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get a specific order by ID.
@@ -181,7 +257,10 @@ def get_order(
     Raises:
         HTTPException: If order not found or not owned by user
     """
-    order = db.query(Order).filter(Order.id == order_id).first()
+    result = await db.execute(
+        select(Order).options(selectinload(Order.items)).where(Order.id == order_id)
+    )
+    order = result.scalars().first()
     
     if not order:
         raise HTTPException(
@@ -197,38 +276,97 @@ def get_order(
     
     return order
 
-@router.get("/seller/orders", response_model=List[SellerOrderItemResponse])
-def get_seller_orders(
+def seller_order_items_query(seller_id: int):
+    """
+    Build the select of order items for one seller's products.
+    
+    Selects only the SellerOrderItemResponse columns, so no relationship is
+    ever lazy-loaded.
+    
+    Args:
+        seller_id: Seller user ID
+    
+    Returns:
+        Select statement (unordered)
+    """
+    return select(
+        OrderItem.id,
+        OrderItem.product_id,
+        Product.name.label("product_name"),
+        OrderItem.quantity,
+        OrderItem.price,
+        OrderItem.order_id,
+        User.email.label("buyer_email"),
+        Order.status.label("order_status")
+    ).join(Product, OrderItem.product_id == Product.id).join(
+        Order, OrderItem.order_id == Order.id
+    ).join(User, Order.buyer_id == User.id).where(
+        Product.seller_id == seller_id
+    )
+
+@router.get("/seller/orders", response_model=Page[SellerOrderItemResponse])
+async def get_seller_orders(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(require_seller),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all order items for products sold by the current seller.
     
     Args:
+        cursor: Cursor from the previous page (pagination)
+        limit: Maximum number of order items to return
         current_user: Current authenticated seller
         db: Database session
         
     Returns:
-        List of order items for seller's products
+        Page of order items for seller's products
     """
-    # Get all order items for seller's products
-    order_items = db.query(OrderItem).join(Product).join(Order).join(User).filter(
-        Product.seller_id == current_user.id
-    ).all()
-    
-    # Format response
-    result = []
-    for item in order_items:
-        result.append({
-            "id": item.id,
-            "product_id": item.product_id,
-            "product_name": item.product.name,
-            "quantity": item.quantity,
-            "price": item.price,
-            "order_id": item.order_id,
-            "buyer_email": item.order.buyer.email,
-            "order_status": item.order.status
-        })
+    stmt = seller_order_items_query(current_user.id)
+    
+    # Oldest order first
+    page = await paginate(db, stmt, [Order.created_at, OrderItem.id], cursor, limit)
+    return FastJSONResponse(page)
+
+@router.get("/seller/orders/export")
+async def export_seller_orders(
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    current_user: User = Depends(require_seller)
+):
+    """
+    Stream every order item for the current seller's products.
+    
+    Args:
+        export_format: "ndjson" (one SellerOrderItemResponse object per line) or "csv"
+        current_user: Current authenticated seller
+        
+    Returns:
+        Streaming file download, oldest order first
+    """
+    stmt = seller_order_items_query(current_user.id).order_by(Order.created_at, OrderItem.id)
+    return export_response(stmt, export_format, "seller-orders")
+
+@router.get("/seller/stats", response_model=SellerStatsResponse)
+async def get_seller_stats(
+    days: int = Query(30, ge=1, le=366),
+    current_user: User = Depends(require_seller),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get revenue, units and order counts for the current seller, in total,
+    per product and per day.
+    
+    Reads the daily totals kept up to date by create_order, so the cost
+    depends on the number of days, not on the number of orders.
     
-    return result
+    Args:
+        days: Number of days to include, counting today (UTC)
+        current_user: Current authenticated seller
+        db: Read replica database session
+        
+    Returns:
+        Sales totals since the first included day
+    """
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    return await sales_stats.get_seller_stats(db, current_user.id, since)
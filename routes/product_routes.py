@@ -1,16 +1,31 @@
 """
 Product management routes.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import os
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from pydantic import BaseModel
-from database import get_db
+from datetime import datetime
+from pydantic import BaseModel, ValidationError
+from database import get_db, get_read_db
 from models import Product, User, UserRole
 from auth import get_current_user, require_seller
+from image_store import is_data_url, store_image_url
+from search import apply_search
+from pagination import Page, paginate
+import catalog_cache
+from fast_json import FastJSONResponse, response_columns
+from export import EXPORT_FORMAT_PATTERN, export_response
+from http_cache import cache_headers, is_conditional, is_not_modified, not_modified_response, weak_etag
+from bulk_import import BULK_IMPORT_MAX_ERRORS, batched, format_validation_error, parse_upload
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
+# Largest batch accepted by POST /api/products/stock
+STOCK_UPDATE_MAX_ITEMS = int(os.getenv("STOCK_UPDATE_MAX_ITEMS", "10000"))
+
 # Pydantic models
 class ProductCreate(BaseModel):
     name: str
@@ -26,6 +41,59 @@ class ProductUpdate(BaseModel):
     stock: Optional[int] = None
     image_url: Optional[str] = None
 
+class ProductImportRow(ProductCreate):
+    # Set to replace an existing product instead of creating one
+    id: Optional[int] = None
+
+class BulkImportError(BaseModel):
+    row: int
+    detail: str
+
+class BulkImportResult(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    errors: List[BulkImportError]
+
+class StockAdjustment(BaseModel):
+    product_id: int
+    # Exactly one of: the new stock level, or a change to the current level
+    stock: Optional[int] = None
+    delta: Optional[int] = None
+
+class StockUpdate(BaseModel):
+    items: List[StockAdjustment]
+
+class StockLevel(BaseModel):
+    product_id: int
+    stock: int
+
+class StockUpdateResult(BaseModel):
+    updated: int
+    products: List[StockLevel]
+
+async def prepare_image_url(image_url: Optional[str]) -> Optional[str]:
+    """
+    Move an uploaded Base64 image into the image store.
+
+    Args:
+        image_url: Image URL or Base64 data URL from the request
+
+    Returns:
+        URL reference to store on the product
+
+    Raises:
+        HTTPException: If the uploaded image is invalid
+    """
+    try:
+        # Decoding and writing the image is blocking file IO
+        return await run_in_threadpool(store_image_url, image_url)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 class ProductResponse(BaseModel):
     id: int
     seller_id: int
@@ -34,45 +102,90 @@ class ProductResponse(BaseModel):
     price: float
     stock: int
     image_url: Optional[str]
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
-@router.get("", response_model=List[ProductResponse])
-def get_products(
-    skip: int = Query(0, ge=0),
+def product_cache_headers(product_id: int, last_modified: Optional[datetime]) -> tuple:
+    """ETag (derived from updated_at) and cache headers for a product."""
+    etag = weak_etag("product", product_id, int(last_modified.timestamp() * 1000000) if last_modified else 0)
+    return etag, cache_headers(etag, last_modified)
+
+def serialize_product(product: Product) -> dict:
+    """Convert a product to its response dictionary for caching."""
+    return ProductResponse.model_validate(product).model_dump()
+
+@router.get("", response_model=Page[ProductResponse])
+async def get_products(
+    request: Request,
+    cursor: Optional[str] = None,
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all products with optional filtering.
     
+    Responses carry a weak ETag derived from the catalog versions, so clients
+    revalidating an unchanged catalog get 304 without the listing query.
+    
     Args:
-        skip: Number of products to skip (pagination)
+        request: Incoming request (for conditional headers)
+        cursor: Cursor from the previous page (pagination)
         limit: Maximum number of products to return
-        search: Optional search term for product name
-        db: Database session
+        search: Optional search term matched against name and description
+        db: Read replica database session
         
     Returns:
-        List of products
+        Page of products, ordered by relevance when searching
     """
-    query = db.query(Product)
+    version, stock_version, last_modified = await catalog_cache.get_catalog_state(db)
+    etag = weak_etag("catalog", version, stock_version)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+    
+    key = catalog_cache.listing_key(search, cursor, limit, version)
+    cached = catalog_cache.get_listing(key)
+    if cached is not None:
+        page, cached_stock_version = cached
+        if cached_stock_version != stock_version:
+            page = {**page, "items": await catalog_cache.refresh_stock(db, page["items"])}
+            catalog_cache.set_listing(key, page, stock_version)
+        return FastJSONResponse(page, headers=headers)
+    
+    stmt = select(*response_columns(ProductResponse, Product))
+    order_columns = [Product.created_at, Product.id]
     
     if search:
-        query = query.filter(Product.name.contains(search))
+        stmt, rank = await apply_search(stmt, search, db)
+        if rank is not None:
+            order_columns = [rank, Product.id]
     
-    products = query.offset(skip).limit(limit).all()
-    return products
+    page = await paginate(db, stmt, order_columns, cursor, limit)
+    catalog_cache.set_listing(key, page, stock_version)
+    return FastJSONResponse(page, headers=headers)
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """
     Get a specific product by ID.
     
+    Responses carry a weak ETag derived from the product's updated_at.
+    Conditional requests are checked against updated_at alone first, so a
+    304 costs one primary-key lookup and no product load.
+    
     Args:
         product_id: Product ID
-        db: Database session
+        request: Incoming request (for conditional headers)
+        response: Outgoing response (for cache headers)
+        db: Read replica database session
         
     Returns:
         Product object
@@ -80,21 +193,47 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: If product not found
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    if is_conditional(request):
+        row = (await db.execute(select(Product.updated_at).where(Product.id == product_id))).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        etag, headers = product_cache_headers(product_id, row.updated_at)
+        if is_not_modified(request, etag, row.updated_at):
+            return not_modified_response(headers)
     
-    if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
-        )
+    version, stock_version, _ = await catalog_cache.get_catalog_state(db)
+    cached = catalog_cache.get_product(product_id, version)
     
-    return product
+    if cached is None:
+        product = await db.get(Product, product_id)
+        
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        
+        product_data = serialize_product(product)
+        catalog_cache.set_product(product_id, product_data, version, stock_version)
+    else:
+        product_data, cached_stock_version = cached
+        if cached_stock_version != stock_version:
+            product_data = (await catalog_cache.refresh_stock(db, [product_data]))[0]
+            catalog_cache.set_product(product_id, product_data, version, stock_version)
+    
+    _, headers = product_cache_headers(product_id, product_data["updated_at"])
+    response.headers.update(headers)
+    
+    return product_data
 
 @router.post("", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-def create_product(
+async def create_product(
     product_data: ProductCreate,
     current_user: User = Depends(require_seller),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new product (seller only).
@@ -107,23 +246,254 @@ def create_product(
     Returns:
         Created product object
     """
+    product_fields = product_data.dict()
+    product_fields["image_url"] = await prepare_image_url(product_fields["image_url"])
+    
     new_product = Product(
         seller_id=current_user.id,
-        **product_data.dict()
+        **product_fields
     )
     
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await catalog_cache.bump_catalog_version(db)
+    await db.commit()
     
     return new_product
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_products(
+    request: Request,
+    current_user: User = Depends(require_seller),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Create or update many products from one upload (seller only).
+    
+    The body is a JSON array, NDJSON or CSV with a header row, where each
+    row has the ProductCreate fields. Rows with an ``id`` replace that
+    product, which must belong to the seller; other rows create products.
+    Rows are validated and written in batches of BULK_IMPORT_BATCH_SIZE,
+    each committed in its own transaction, so invalid rows are reported
+    without rejecting the rest of the upload.
+    
+    Args:
+        request: Incoming request with the upload body
+        current_user: Current authenticated seller
+        db: Database session
+        
+    Returns:
+        Counts of created, updated and failed rows, plus per-row errors
+        
+    Raises:
+        HTTPException: If the upload format is unsupported or malformed
+    """
+    rows = parse_upload(request)
+    result = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+    
+    # Validation and ownership errors are found in separate passes, so each
+    # batch's errors are sorted before the cap is applied. Batches arrive in
+    # row order, so the report stays in row order and keeps the earliest rows
+    batch_errors = []
+    
+    def fail(row_number: int, detail: str):
+        result["failed"] += 1
+        batch_errors.append({"row": row_number, "detail": detail})
+    
+    async for batch in batched(rows):
+        batch_errors.clear()
+        valid = []
+        for row_number, data, error in batch:
+            if error is None:
+                try:
+                    valid.append((row_number, ProductImportRow.model_validate(data)))
+                    continue
+                except ValidationError as e:
+                    error = format_validation_error(e)
+            fail(row_number, error)
+        
+        update_ids = {row.id for _, row in valid if row.id is not None}
+        owned_ids = set()
+        if update_ids:
+            owned = await db.execute(
+                select(Product.id).where(
+                    Product.id.in_(update_ids),
+                    Product.seller_id == current_user.id
+                )
+            )
+            owned_ids = set(owned.scalars())
+        
+        now = datetime.utcnow()
+        inserts = []
+        updates = []
+        for row_number, row in valid:
+            if row.id is not None and row.id not in owned_ids:
+                fail(row_number, "Product not found")
+                continue
+            
+            values = row.model_dump(exclude={"id"})
+            if is_data_url(values["image_url"]):
+                try:
+                    values["image_url"] = await run_in_threadpool(store_image_url, values["image_url"])
+                except ValueError as e:
+                    fail(row_number, str(e))
+                    continue
+            
+            if row.id is None:
+                inserts.append({**values, "seller_id": current_user.id, "created_at": now, "updated_at": now})
+            else:
+                updates.append({**values, "id": row.id, "updated_at": now})
+        
+        batch_errors.sort(key=lambda error: error["row"])
+        result["errors"].extend(batch_errors[:BULK_IMPORT_MAX_ERRORS - len(result["errors"])])
+        
+        if not inserts and not updates:
+            continue
+        
+        # executemany-style statements, one transaction per batch
+        if inserts:
+            await db.execute(insert(Product), inserts)
+        if updates:
+            await db.execute(update(Product), updates)
+        await catalog_cache.bump_catalog_version(db)
+        await db.commit()
+        
+        result["created"] += len(inserts)
+        result["updated"] += len(updates)
+    
+    return result
+
+@router.post("/stock", response_model=StockUpdateResult)
+async def update_stock(
+    stock_data: StockUpdate,
+    current_user: User = Depends(require_seller),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Set or adjust the stock of many products at once (seller only).
+    
+    All changes are applied in one transaction, or none are. A ``delta`` is
+    added atomically to the current stock, so it composes with concurrent
+    checkouts; a ``stock`` value overwrites the level, including any
+    checkout decrements that committed since the caller read it.
+    
+    Args:
+        stock_data: Stock changes, one per product
+        current_user: Current authenticated seller
+        db: Database session
+        
+    Returns:
+        Number of products updated and their new stock levels
+        
+    Raises:
+        HTTPException: If a change is malformed (400), a product is not
+            the seller's (404) or a delta would make stock negative (409)
+    """
+    if not stock_data.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Stock update must contain at least one item"
+        )
+    if len(stock_data.items) > STOCK_UPDATE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Stock update may contain at most {STOCK_UPDATE_MAX_ITEMS} items"
+        )
+    
+    changes = {}
+    for item in stock_data.items:
+        if (item.stock is None) == (item.delta is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Set exactly one of stock or delta for product {item.product_id}"
+            )
+        if item.stock is not None and item.stock < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Stock for product {item.product_id} cannot be negative"
+            )
+        if item.product_id in changes:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product {item.product_id} appears more than once"
+            )
+        changes[item.product_id] = item
+    
+    # Check ownership and read current stock with one query. Rows are locked
+    # in id order (on databases with row locks), the order create_order uses.
+    result = await db.execute(
+        select(Product.id, Product.stock)
+        .where(Product.id.in_(changes.keys()), Product.seller_id == current_user.id)
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    current_stock = dict(result.all())
+    
+    missing = changes.keys() - current_stock.keys()
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Products not found: {', '.join(str(product_id) for product_id in sorted(missing))}"
+        )
+    
+    new_levels = {
+        product_id: (item.stock if item.stock is not None else current_stock[product_id] + item.delta)
+        for product_id, item in changes.items()
+    }
+    rejected = [product_id for product_id in sorted(changes) if new_levels[product_id] < 0]
+    if rejected:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Insufficient stock for products: {', '.join(str(product_id) for product_id in rejected)}"
+        )
+    
+    # One executemany statement covers both kinds of change:
+    # stock = coalesce(new level, current level) + delta. Deltas are applied
+    # to the stock at write time and guarded against going negative, so a
+    # checkout that commits after the read above is never lost.
+    products = Product.__table__
+    new_stock = func.coalesce(
+        bindparam("new_stock", type_=products.c.stock.type), products.c.stock
+    ) + bindparam("delta")
+    stmt = (
+        update(products)
+        .where(products.c.id == bindparam("product_id"), new_stock >= 0)
+        .values(stock=new_stock, updated_at=datetime.utcnow())
+    )
+    params = [
+        {"product_id": product_id, "new_stock": changes[product_id].stock, "delta": changes[product_id].delta or 0}
+        for product_id in sorted(changes)
+    ]
+    result = await db.execute(stmt, params)
+    
+    # Without row locks a checkout may have taken the stock since it was read
+    if result.supports_sane_multi_rowcount() and result.rowcount != len(params):
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Insufficient stock after concurrent orders, retry the update"
+        )
+    
+    result = await db.execute(
+        select(Product.id, Product.stock)
+        .where(Product.id.in_(changes.keys()))
+        .order_by(Product.id)
+    )
+    levels = result.all()
+    
+    await catalog_cache.bump_stock_version(db)
+    await db.commit()
+    
+    return {
+        "updated": len(params),
+        "products": [{"product_id": product_id, "stock": stock} for product_id, stock in levels]
+    }
+
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(
+async def update_product(
     product_id: int,
     product_data: ProductUpdate,
     current_user: User = Depends(require_seller),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update a product (seller only, own products only).
@@ -140,7 +510,7 @@ def update_product(
     Raises:
         HTTPException: If product not found or not owned by seller
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -156,19 +526,21 @@ def update_product(
     
     # Update only provided fields
     update_data = product_data.dict(exclude_unset=True)
+    if "image_url" in update_data:
+        update_data["image_url"] = await prepare_image_url(update_data["image_url"])
     for field, value in update_data.items():
         setattr(product, field, value)
     
-    db.commit()
-    db.refresh(product)
+    await catalog_cache.bump_catalog_version(db)
+    await db.commit()
     
     return product
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+async def delete_product(
     product_id: int,
     current_user: User = Depends(require_seller),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Delete a product (seller only, own products only).
@@ -181,7 +553,7 @@ def delete_product(
     Raises:
         HTTPException: If product not found or not owned by seller
     """
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -195,25 +567,53 @@ def delete_product(
             detail="You can only delete your own products"
         )
     
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await catalog_cache.bump_catalog_version(db)
+    await db.commit()
     
     return None
 
-@router.get("/seller/my-products", response_model=List[ProductResponse])
-def get_seller_products(
+@router.get("/seller/my-products", response_model=Page[ProductResponse])
+async def get_seller_products(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(require_seller),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get all products for the current seller.
     
     Args:
+        cursor: Cursor from the previous page (pagination)
+        limit: Maximum number of products to return
         current_user: Current authenticated seller
         db: Database session
         
     Returns:
-        List of seller's products
+        Page of seller's products
+    """
+    stmt = select(*response_columns(ProductResponse, Product)).where(
+        Product.seller_id == current_user.id
+    )
+    page = await paginate(db, stmt, [Product.created_at, Product.id], cursor, limit)
+    return FastJSONResponse(page)
+
+@router.get("/seller/my-products/export")
+async def export_seller_products(
+    export_format: str = Query("ndjson", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    current_user: User = Depends(require_seller)
+):
+    """
+    Stream all products of the current seller.
+    
+    Args:
+        export_format: "ndjson" (one ProductResponse object per line) or "csv"
+        current_user: Current authenticated seller
+        
+    Returns:
+        Streaming file download, oldest product first
     """
-    products = db.query(Product).filter(Product.seller_id == current_user.id).all()
-    return products
+    stmt = select(*response_columns(ProductResponse, Product)).where(
+        Product.seller_id == current_user.id
+    ).order_by(Product.created_at, Product.id)
+    return export_response(stmt, export_format, "my-products")
@@ -0,0 +1,63 @@
+"""
+Admin routes for downloading request profiles saved by profiling.py.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+from profiling import PROFILE_ROUTES_PREFIX, PROFILE_TOKEN, list_profiles, profile_media_type, profile_path, token_matches
+
+router = APIRouter(prefix=PROFILE_ROUTES_PREFIX, tags=["Admin"])
+
+class ProfileListResponse(BaseModel):
+    profiles: List[str]
+
+def require_profile_token(token: Optional[str]):
+    """
+    Check the X-Profile-Token header.
+
+    Raises:
+        HTTPException: 404 if profiling by token is disabled, 403 if the token is wrong
+    """
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not token_matches(token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profile token")
+
+@router.get("", response_model=ProfileListResponse)
+async def get_profiles(x_profile_token: Optional[str] = Header(None)):
+    """
+    List the saved profiles, newest first.
+
+    Args:
+        x_profile_token: PROFILE_TOKEN
+
+    Returns:
+        Profile file names
+
+    Raises:
+        HTTPException: 404 if profiling by token is disabled, 403 if the token is wrong
+    """
+    require_profile_token(x_profile_token)
+    return {"profiles": list_profiles()}
+
+@router.get("/{name}")
+async def download_profile(name: str, x_profile_token: Optional[str] = Header(None)):
+    """
+    Download a saved profile.
+
+    Args:
+        name: Profile file name, from the list or an X-Profile-Id header plus extension
+        x_profile_token: PROFILE_TOKEN
+
+    Returns:
+        The profile file
+
+    Raises:
+        HTTPException: 404 if there is no such profile, 403 if the token is wrong
+    """
+    require_profile_token(x_profile_token)
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, media_type=profile_media_type(name), filename=name)
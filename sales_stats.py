@@ -0,0 +1,172 @@
+"""
+Seller sales aggregates.
+
+create_order adds every order to per-product and per-seller daily totals in
+the same transaction, so seller stats read a number of rows bounded by the
+days requested rather than by the order history.
+
+Recompute the totals from the full order history (once after upgrading, or
+after editing orders by hand) with:
+    python sales_stats.py
+"""
+import importlib
+from datetime import date
+from sqlalchemy import delete, distinct, func, insert, select, text
+from database import engine
+from models import Order, OrderItem, Product, ProductDailySales, SellerDailySales
+
+# Backends with INSERT ... ON CONFLICT support. Their dialect modules are
+# imported on first use, so processes only load the backend they run on.
+UPSERT_DIALECTS = ("sqlite", "postgresql")
+
+TOTAL_COLUMNS = ("revenue", "units", "orders")
+
+def increment_statement(dialect_name: str, model, key_columns: list):
+    """
+    Build an INSERT that adds to the totals of an existing row instead of failing.
+
+    Args:
+        dialect_name: Database backend name
+        model: ProductDailySales or SellerDailySales
+        key_columns: Primary key column names
+
+    Returns:
+        Insert statement for executemany
+
+    Raises:
+        ValueError: If the backend has no upsert support
+    """
+    if dialect_name not in UPSERT_DIALECTS:
+        raise ValueError(f"Unsupported database backend: {dialect_name}")
+    table = model.__table__
+    stmt = importlib.import_module(f"sqlalchemy.dialects.{dialect_name}").insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: table.c[column] + stmt.excluded[column] for column in TOTAL_COLUMNS}
+    )
+
+async def record_order(db, day: date, items: list):
+    """
+    Add an order to the daily sales totals in the current transaction.
+
+    Args:
+        db: Async database session holding the order
+        day: UTC day of the order
+        items: (seller_id, product_id, quantity, price) for each product in
+            the order, each product appearing once
+    """
+    dialect_name = db.bind.dialect.name
+    product_rows = []
+    seller_rows = {}
+    for seller_id, product_id, quantity, price in items:
+        revenue = price * quantity
+        product_rows.append({
+            "product_id": product_id,
+            "day": day,
+            "seller_id": seller_id,
+            "revenue": revenue,
+            "units": quantity,
+            "orders": 1,
+        })
+        totals = seller_rows.setdefault(
+            seller_id, {"seller_id": seller_id, "day": day, "revenue": 0.0, "units": 0, "orders": 1}
+        )
+        totals["revenue"] += revenue
+        totals["units"] += quantity
+
+    # Write rows in key order so concurrent orders lock them in the same order
+    product_rows.sort(key=lambda row: row["product_id"])
+    await db.execute(
+        increment_statement(dialect_name, ProductDailySales, ["product_id", "day"]), product_rows
+    )
+    await db.execute(
+        increment_statement(dialect_name, SellerDailySales, ["seller_id", "day"]),
+        [seller_rows[seller_id] for seller_id in sorted(seller_rows)]
+    )
+
+async def get_seller_stats(db, seller_id: int, since: date) -> dict:
+    """
+    Read a seller's sales from the daily totals.
+
+    Args:
+        db: Async database session
+        seller_id: Seller user ID
+        since: First UTC day to include
+
+    Returns:
+        Dictionary with overall ``totals``, per-product totals (best selling
+        first) and per-day totals (oldest first)
+    """
+    result = await db.execute(
+        select(
+            SellerDailySales.day,
+            SellerDailySales.revenue,
+            SellerDailySales.units,
+            SellerDailySales.orders
+        )
+        .where(SellerDailySales.seller_id == seller_id, SellerDailySales.day >= since)
+        .order_by(SellerDailySales.day)
+    )
+    days = [row._asdict() for row in result]
+
+    revenue = func.sum(ProductDailySales.revenue)
+    result = await db.execute(
+        select(
+            ProductDailySales.product_id,
+            Product.name.label("product_name"),
+            revenue.label("revenue"),
+            func.sum(ProductDailySales.units).label("units"),
+            func.sum(ProductDailySales.orders).label("orders")
+        )
+        .outerjoin(Product, ProductDailySales.product_id == Product.id)
+        .where(ProductDailySales.seller_id == seller_id, ProductDailySales.day >= since)
+        .group_by(ProductDailySales.product_id, Product.name)
+        .order_by(revenue.desc(), ProductDailySales.product_id)
+    )
+    products = [row._asdict() for row in result]
+
+    totals = {column: sum(day[column] for day in days) for column in TOTAL_COLUMNS}
+    return {"since": since, "totals": totals, "products": products, "days": days}
+
+def rebuild_sales_summary(bind=engine):
+    """
+    Recompute all daily sales totals from the order history in one transaction.
+
+    Args:
+        bind: Engine to rebuild on
+    """
+    day = func.date(Order.created_at)
+    revenue = func.sum(OrderItem.price * OrderItem.quantity)
+    units = func.sum(OrderItem.quantity)
+    orders = func.count(distinct(OrderItem.order_id))
+    columns = ["day", "revenue", "units", "orders"]
+
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Checkouts wait until the rebuild commits, so each order is
+            # counted exactly once
+            conn.execute(text("LOCK TABLE product_daily_sales, seller_daily_sales IN EXCLUSIVE MODE"))
+
+        conn.execute(delete(ProductDailySales))
+        conn.execute(delete(SellerDailySales))
+
+        conn.execute(insert(ProductDailySales).from_select(
+            ["product_id", "seller_id"] + columns,
+            select(OrderItem.product_id, Product.seller_id, day, revenue, units, orders)
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .group_by(OrderItem.product_id, Product.seller_id, day)
+        ))
+        conn.execute(insert(SellerDailySales).from_select(
+            ["seller_id"] + columns,
+            select(Product.seller_id, day, revenue, units, orders)
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(Product, OrderItem.product_id == Product.id)
+            .group_by(Product.seller_id, day)
+        ))
+
+if __name__ == "__main__":
+    from database import init_db
+    init_db()
+    rebuild_sales_summary()
+    print("[OK] Rebuilt seller sales totals")
@@ -0,0 +1,170 @@
+"""
+Full-text product search backed by an SQLite FTS5 index.
+
+The ``products_fts`` virtual table indexes product name and description and
+is kept in sync with the products table by triggers, so search no longer
+scans the whole catalog with ``LIKE '%term%'``.
+"""
+import re
+from typing import Optional
+from sqlalchemy import Float, column, false, func, literal_column, table, text
+from sqlalchemy.exc import OperationalError
+from models import Product
+
+FTS_TABLE = "products_fts"
+fts_table = table(FTS_TABLE, column("rowid"))
+
+# Matches in the name count for more than matches in the description
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    name, description,
+    content='products', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+FTS_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Cached per process: whether the FTS index exists in the connected database
+_fts_available = None
+
+def init_search_index(engine):
+    """
+    Create the FTS index and sync triggers if they do not exist yet.
+
+    Args:
+        engine: SQLAlchemy engine the products table lives in
+    """
+    global _fts_available
+
+    if engine.dialect.name != "sqlite":
+        _fts_available = False
+        return
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE}
+        ).first()
+
+        if not exists:
+            try:
+                conn.execute(text(FTS_TABLE_SQL))
+            except OperationalError as e:
+                print(f"Note: FTS5 unavailable, product search will use LIKE: {e}")
+                _fts_available = False
+                return
+            # Index products that were created before the index existed
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+        for trigger_sql in FTS_TRIGGERS_SQL:
+            conn.execute(text(trigger_sql))
+
+    _fts_available = True
+
+def drop_search_index(engine):
+    """
+    Drop the FTS index and its triggers.
+
+    Bulk loads run much faster without a trigger per inserted product;
+    init_search_index recreates the index from the products table afterwards.
+
+    Args:
+        engine: SQLAlchemy engine the products table lives in
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    with engine.begin() as conn:
+        for suffix in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+async def fts_available(db) -> bool:
+    """Check (once per process) whether the FTS index can be queried."""
+    global _fts_available
+
+    if _fts_available is None:
+        bind = db.get_bind()
+        if bind.dialect.name != "sqlite":
+            _fts_available = False
+        else:
+            result = await db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE}
+            )
+            _fts_available = result.first() is not None
+    return _fts_available
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Turn free-text user input into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so ``"wire mou"`` matches
+    "Wireless Mouse". Quoting keeps FTS5 operators in user input inert.
+
+    Args:
+        search: Raw search string
+
+    Returns:
+        MATCH expression, or None if the input has no searchable words
+    """
+    tokens = TOKEN_PATTERN.findall(search)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+async def apply_search(stmt, search: str, db):
+    """
+    Filter a product select by a search term.
+
+    Args:
+        stmt: Select over Product
+        search: Raw search string
+        db: Async database session
+
+    Returns:
+        Tuple of (filtered select, relevance expression). The relevance
+        expression sorts best matches first and is None when the FTS index
+        is unavailable.
+    """
+    if not await fts_available(db):
+        return stmt.where(Product.name.contains(search)), None
+
+    match_query = build_match_query(search)
+    if match_query is None:
+        return stmt.where(false()), None
+
+    fts = literal_column(FTS_TABLE)
+    rank = func.bm25(fts, NAME_WEIGHT, DESCRIPTION_WEIGHT, type_=Float)
+    stmt = (
+        stmt.join(fts_table, fts_table.c.rowid == Product.id)
+        .where(fts.op("MATCH")(match_query))
+    )
+    return stmt, rank
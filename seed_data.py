@@ -4,6 +4,7 @@ Seed script to populate the database with sample data for testing.
 from database import SessionLocal
 from models import User, Product, UserRole
 from auth import hash_password
+from catalog_cache import catalog_version_update
 
 def seed_database():
     """Add sample users and products to the database."""
@@ -162,6 +163,7 @@ def seed_database():
         for product in products:
             db.add(product)
         
+        db.execute(catalog_version_update())
         db.commit()
         print(f"[OK] Created {len(products)} sample products")
         
@@ -181,4 +183,6 @@ def seed_database():
         db.close()
 
 if __name__ == "__main__":
+    from database import init_db
+    init_db()
     seed_database()
@@ -0,0 +1,209 @@
+"""
+Slow-query log with automatic query plans.
+
+Statements that run for at least SLOW_QUERY_THRESHOLD_MS are written to a
+rotating log file, one JSON object per line, with their bind parameters
+redacted, the route that ran them and the database's query plan
+(``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on PostgreSQL).
+
+The request only checks the duration and queues the statement; a
+background thread runs the EXPLAIN and writes the log, so a slow query
+never gets slower for being logged. When the queue is full, statements are
+dropped and counted in the next record. Plans are taken on the primary
+database, also for statements that ran on the read replica.
+"""
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_THRESHOLD_SECONDS = SLOW_QUERY_THRESHOLD_MS / 1000
+
+# Empty disables the slow-query log
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+
+# Slow statements waiting for the background thread
+SLOW_QUERY_QUEUE_SIZE = 100
+
+# Statements the database can plan without running them
+EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+
+# Positional placeholders of asyncpg, which the sync psycopg2 engine
+# running the EXPLAIN writes as %s
+ASYNCPG_PLACEHOLDER = re.compile(r"\$(\d+)")
+
+logger = logging.getLogger(__name__)
+
+_queue: "queue.Queue" = queue.Queue(maxsize=SLOW_QUERY_QUEUE_SIZE)
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+_disabled = False
+_dropped = 0
+_dropped_lock = threading.Lock()
+
+def redact(value):
+    """Replace a bind parameter that may hold personal data with its type and size."""
+    if value is None or isinstance(value, (bool, int, float, Decimal, date, datetime)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return f"<{type(value).__name__}>"
+
+def report(dialect_name: str, driver: str, statement: str, parameters, executemany: bool,
+           seconds: float, method: str, route: str):
+    """
+    Queue a slow statement for logging without blocking.
+
+    Never raises: the statement has already run, and a broken log must not
+    fail the request.
+
+    Args:
+        dialect_name: Backend that ran the statement
+        driver: DBAPI driver that ran the statement
+        statement: SQL as sent to the driver
+        parameters: Driver parameters (a list of them for executemany)
+        executemany: Whether the statement ran once per parameter set
+        seconds: Execution time
+        method: HTTP method of the request that ran it, or ""
+        route: Route template of the request that ran it, or "none"
+    """
+    global _dropped
+
+    # The log's own EXPLAINs are never logged
+    if _disabled or not SLOW_QUERY_LOG_FILE or threading.current_thread() is _thread:
+        return
+    if _thread is None and not start():
+        return
+    try:
+        _queue.put_nowait((
+            datetime.utcnow(), dialect_name, driver, statement, parameters,
+            executemany, seconds, method, route
+        ))
+    except queue.Full:
+        with _dropped_lock:
+            _dropped += 1
+
+def start() -> bool:
+    """
+    Start the background thread and open the log file.
+
+    If the log file cannot be opened, logs one warning and disables the
+    slow-query log for the rest of the process.
+
+    Returns:
+        Whether the slow-query log is running
+    """
+    global _thread, _disabled
+
+    with _thread_lock:
+        if _thread is not None:
+            return True
+        if _disabled or not SLOW_QUERY_LOG_FILE:
+            return False
+        try:
+            if not logger.handlers:
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG_FILE, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+            thread = threading.Thread(target=_run, name="slow-query-log", daemon=True)
+            thread.start()
+        except (OSError, RuntimeError) as e:
+            _disabled = True
+            logger.warning("Slow-query log disabled: cannot write %s (%s)", SLOW_QUERY_LOG_FILE, e)
+            return False
+        _thread = thread
+        return True
+
+def shutdown(timeout: float = 5):
+    """Write the queued statements and stop the background thread."""
+    global _thread
+
+    with _thread_lock:
+        if _thread is None:
+            return
+        try:
+            _queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        _thread.join(timeout)
+        _thread = None
+
+def explain(dialect_name: str, driver: str, statement: str, parameters) -> Optional[list]:
+    """
+    Get the query plan of a statement from the primary database.
+
+    Returns:
+        Plan lines, or None if the statement cannot be explained
+    """
+    from database import engine
+
+    if not EXPLAINABLE.match(statement) or dialect_name != engine.dialect.name:
+        return None
+
+    if dialect_name == "sqlite":
+        sql = f"EXPLAIN QUERY PLAN {statement}"
+    else:
+        sql = f"EXPLAIN {statement}"
+        if driver == "asyncpg":
+            positional = list(parameters or ())
+            values = []
+            sql = ASYNCPG_PLACEHOLDER.sub(
+                lambda m: values.append(positional[int(m.group(1)) - 1]) or "%s",
+                sql.replace("%", "%%")
+            )
+            parameters = tuple(values)
+
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(sql, parameters or ()).all()
+        conn.rollback()
+    # SQLite returns (id, parent, notused, detail); PostgreSQL one line per row
+    return [row[-1] for row in rows]
+
+def _run():
+    """Background thread: explain and log queued statements until shut down."""
+    global _dropped
+
+    while True:
+        item = _queue.get()
+        if item is None:
+            return
+        logged_at, dialect_name, driver, statement, parameters, executemany, seconds, method, route = item
+        # The plan only needs one parameter set
+        first_parameters = parameters[0] if executemany and parameters else parameters
+
+        record = {
+            "time": logged_at.isoformat() + "Z",
+            "duration_ms": round(seconds * 1000, 2),
+            "method": method,
+            "route": route,
+            "statement": statement,
+            "parameters": redact(first_parameters),
+        }
+        if executemany:
+            record["parameter_sets"] = len(parameters)
+        try:
+            record["plan"] = explain(dialect_name, driver, statement, first_parameters)
+        except Exception as e:
+            record["plan_error"] = f"{type(e).__name__}: {e}"
+        with _dropped_lock:
+            if _dropped:
+                record["dropped_since_last"], _dropped = _dropped, 0
+        logger.info(json.dumps(record, default=str))
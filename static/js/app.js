@@ -12,6 +12,8 @@ const state = {
     cart: [],
     products: [],
     orders: [],
+    sellerOrders: [],
+    sellerProducts: [],
     currentView: 'products',
     editingProduct: null
 };
@@ -51,6 +53,16 @@ const api = {
         return this.request(endpoint);
     },
 
+    // Fetch one page of a paginated endpoint; pass the previous page's
+    // next_cursor to get the page after it
+    getPage(endpoint, cursor = null) {
+        if (!cursor) {
+            return this.get(endpoint);
+        }
+        const separator = endpoint.includes('?') ? '&' : '?';
+        return this.get(`${endpoint}${separator}cursor=${encodeURIComponent(cursor)}`);
+    },
+
     post(endpoint, data) {
         return this.request(endpoint, {
             method: 'POST',
@@ -72,6 +84,22 @@ const api = {
     }
 };
 
+// Append a "Load more" button to a list while its endpoint has more pages
+function showLoadMore(containerId, nextCursor, loadMore) {
+    if (!nextCursor) return;
+
+    const button = document.createElement('button');
+    button.className = 'btn-secondary load-more';
+    button.textContent = 'Load more';
+    button.addEventListener('click', async () => {
+        button.disabled = true;
+        await loadMore(nextCursor);
+        // Only reached if the list was not re-rendered (the request failed)
+        button.disabled = false;
+    });
+    document.getElementById(containerId).appendChild(button);
+}
+
 // Notification System
 function showNotification(message, type = 'info') {
     const notification = document.createElement('div');
@@ -2,14 +2,15 @@
  * Order management functionality
  */
 
-// Load buyer orders
-async function loadOrders() {
+// Load the first page of buyer orders; with a cursor, append the next page
+async function loadOrders(cursor = null) {
     if (!state.user || state.user.role !== 'buyer') return;
 
     try {
-        const orders = await api.get('/api/orders');
-        state.orders = orders;
-        displayOrders(orders);
+        const page = await api.getPage('/api/orders', cursor);
+        state.orders = cursor ? state.orders.concat(page.items) : page.items;
+        displayOrders(state.orders);
+        showLoadMore('orders-list', page.next_cursor, loadOrders);
     } catch (error) {
         console.error('Failed to load orders:', error);
     }
@@ -55,18 +56,52 @@ function displayOrders(orders) {
     `).join('');
 }
 
-// Load seller orders
-async function loadSellerOrders() {
+// Load sales totals and the first page of seller orders; with a cursor,
+// append the next page of orders
+async function loadSellerOrders(cursor = null) {
     if (!state.user || state.user.role !== 'seller') return;
 
     try {
-        const orders = await api.get('/api/orders/seller/orders');
-        displaySellerOrders(orders);
+        const [stats, page] = await Promise.all([
+            cursor ? null : api.get('/api/orders/seller/stats?days=30'),
+            api.getPage('/api/orders/seller/orders', cursor)
+        ]);
+        if (stats) {
+            displaySellerStats(stats);
+        }
+        state.sellerOrders = cursor ? state.sellerOrders.concat(page.items) : page.items;
+        displaySellerOrders(state.sellerOrders);
+        showLoadMore('seller-orders-list', page.next_cursor, loadSellerOrders);
     } catch (error) {
         console.error('Failed to load seller orders:', error);
     }
 }
 
+// Display seller sales totals for the last 30 days
+function displaySellerStats(stats) {
+    const statsEl = document.getElementById('seller-stats');
+    const topProduct = stats.products[0];
+
+    statsEl.innerHTML = `
+        <div class="stat-card">
+            <div class="stat-label">Revenue (30 days)</div>
+            <div class="stat-value">₹${Math.round(stats.totals.revenue).toLocaleString('en-IN')}</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-label">Orders (30 days)</div>
+            <div class="stat-value">${stats.totals.orders.toLocaleString('en-IN')}</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-label">Units sold (30 days)</div>
+            <div class="stat-value">${stats.totals.units.toLocaleString('en-IN')}</div>
+        </div>
+        <div class="stat-card">
+            <div class="stat-label">Top product</div>
+            <div class="stat-value">${topProduct ? (topProduct.product_name || `Product ID: ${topProduct.product_id}`) : '-'}</div>
+        </div>
+    `;
+}
+
 // Display seller orders
 function displaySellerOrders(orders) {
     const ordersList = document.getElementById('seller-orders-list');
@@ -6,7 +6,8 @@
 async function loadProducts(search = '') {
     try {
         const endpoint = search ? `/api/products?search=${encodeURIComponent(search)}` : '/api/products';
-        const products = await api.get(endpoint);
+        const page = await api.get(endpoint);
+        const products = page.items;
         state.products = products;
         displayProducts(products);
     } catch (error) {
@@ -86,13 +87,16 @@ function addToCart(productId) {
     showNotification(`${product.name} added to cart`, 'success');
 }
 
-// Seller: Load seller's products
-async function loadSellerProducts() {
+// Seller: Load the first page of the seller's products; with a cursor,
+// append the next page
+async function loadSellerProducts(cursor = null) {
     if (!state.user || state.user.role !== 'seller') return;
 
     try {
-        const products = await api.get('/api/products/seller/my-products');
-        displaySellerProducts(products);
+        const page = await api.getPage('/api/products/seller/my-products', cursor);
+        state.sellerProducts = cursor ? state.sellerProducts.concat(page.items) : page.items;
+        displaySellerProducts(state.sellerProducts);
+        showLoadMore('seller-products-grid', page.next_cursor, loadSellerProducts);
     } catch (error) {
         console.error('Failed to load seller products:', error);
     }
@@ -0,0 +1,188 @@
+"""
+Precompressed, fingerprinted static asset serving.
+
+On the first static request every CSS and JS file under the static
+directory is read once, given a content-hashed name (``js/app.js`` -> ``js/app.3f2a9c1b7d.js``) and
+compressed with gzip and, when the optional ``brotli`` package is installed,
+brotli. index.html is rewritten to reference the fingerprinted names, so
+browsers can cache assets forever and a deploy changes their URLs instead.
+Building takes a few hundred milliseconds (mostly brotli), so it is deferred
+until a static file is requested rather than delaying every worker's start
+and API-only requests. Restart the server after editing files under ``static/``.
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import re
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from http_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:  # gzip is always available
+    brotli = None
+
+# Files given fingerprinted names, and their content types
+FINGERPRINTED_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+}
+HTML_CONTENT_TYPE = "text/html; charset=utf-8"
+FINGERPRINT_LENGTH = 10
+
+# Fingerprinted URLs change whenever their content does
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# index.html and unfingerprinted paths must be revalidated to pick up deploys
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 256
+
+# Preferred encodings, best first
+ENCODING_PREFERENCE = ("br", "gzip")
+
+# src="/..." and href="/..." attributes in index.html
+ASSET_REFERENCE = re.compile(r'((?:src|href)=")(/[^"]+)(")')
+
+def accepted_encodings(accept_encoding: Optional[str]) -> set:
+    """
+    Parse an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Header value sent by the client
+
+    Returns:
+        Set of lowercase encodings the client accepts (q > 0)
+    """
+    encodings = set()
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            encodings.add(name)
+    return encodings
+
+class StaticAsset:
+    """A static file held in memory in every encoding worth serving."""
+
+    def __init__(self, content: bytes, content_type: str, cache_control: str):
+        """
+        Args:
+            content: Uncompressed file contents
+            content_type: Content-Type header value
+            cache_control: Cache-Control header value
+        """
+        self.content_type = content_type
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(content).hexdigest()
+        self.bodies = {"identity": content}
+
+        if len(content) >= MIN_COMPRESS_BYTES:
+            compressed = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed["br"] = brotli.compress(content, quality=11)
+            for encoding, body in compressed.items():
+                if len(body) < len(content):
+                    self.bodies[encoding] = body
+
+    def select_encoding(self, accept_encoding: Optional[str]) -> str:
+        """Pick the smallest encoding the client accepts."""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in self.bodies and encoding in accepted:
+                return encoding
+        return "identity"
+
+    def etag(self, encoding: str) -> str:
+        """Strong ETag for one encoding of the asset."""
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        return f'"{self.digest[:16]}{suffix}"'
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves CSS, JS and index.html from precompressed
+    in-memory copies, falling back to plain file serving for everything else.
+    """
+
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.assets = {}
+        self.manifest = {}
+        self.built = False
+        self.build_lock = asyncio.Lock()
+
+    def build(self):
+        """Read, fingerprint and compress the assets and rewrite index.html."""
+        for root, _, filenames in os.walk(self.directory):
+            for filename in sorted(filenames):
+                _, ext = os.path.splitext(filename)
+                if ext not in FINGERPRINTED_TYPES:
+                    continue
+
+                file_path = os.path.join(root, filename)
+                with open(file_path, "rb") as f:
+                    content = f.read()
+
+                relative = os.path.relpath(file_path, self.directory).replace(os.sep, "/")
+                fingerprint = hashlib.sha256(content).hexdigest()[:FINGERPRINT_LENGTH]
+                hashed = f"{relative[:-len(ext)]}.{fingerprint}{ext}"
+
+                asset = StaticAsset(content, FINGERPRINTED_TYPES[ext], IMMUTABLE_CACHE_CONTROL)
+                self.assets[hashed] = asset
+                # Old pages may still request the original name
+                self.assets[relative] = StaticAsset(content, asset.content_type, REVALIDATE_CACHE_CONTROL)
+                self.manifest["/" + relative] = "/" + hashed
+
+        index_path = os.path.join(self.directory, "index.html")
+        if os.path.isfile(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                html = f.read()
+            html = ASSET_REFERENCE.sub(
+                lambda m: m.group(1) + self.manifest.get(m.group(2), m.group(2)) + m.group(3),
+                html
+            )
+            self.assets["index.html"] = StaticAsset(
+                html.encode("utf-8"), HTML_CONTENT_TYPE, REVALIDATE_CACHE_CONTROL
+            )
+        self.built = True
+
+    async def get_response(self, path: str, scope) -> Response:
+        """Serve an in-memory asset if there is one, otherwise defer to StaticFiles."""
+        if not self.built:
+            async with self.build_lock:
+                if not self.built:
+                    await run_in_threadpool(self.build)
+        key = "index.html" if path in ("", ".") else path.replace(os.sep, "/")
+        asset = self.assets.get(key)
+        if asset is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        encoding = asset.select_encoding(request_headers.get("accept-encoding"))
+        etag = asset.etag(encoding)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": asset.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(asset.bodies[encoding], media_type=asset.content_type, headers=headers)
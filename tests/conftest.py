@@ -0,0 +1,106 @@
+"""
+Shared test setup.
+
+Tests run against a fresh SQLite database in a temporary directory and call
+the app in-process through httpx. The environment is configured before any
+app module is imported, since database.py and auth.py read it at import.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+
+TEST_DIR = tempfile.mkdtemp(prefix="ecommerce-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DIR}/test.db"
+os.environ["IMAGE_STORE_DIR"] = os.path.join(TEST_DIR, "image_store")
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["SLOW_QUERY_LOG_FILE"] = ""
+os.environ.pop("DATABASE_REPLICA_URL", None)
+os.environ.pop("PROFILE_TOKEN", None)
+os.environ.pop("PROFILE_SAMPLE_RATE", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from sqlalchemy import event
+from auth import create_access_token
+from database import SessionLocal, async_engine, engine, init_db
+from main import app
+from models import Product, User, UserRole
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema once for the whole test session."""
+    init_db()
+    yield
+    engine.dispose()
+
+def run(coro):
+    """
+    Run a coroutine on a new event loop.
+
+    Pooled async connections belong to the loop that opened them, so they
+    are closed before the loop ends.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+@asynccontextmanager
+async def client():
+    """HTTP client calling the app in-process; unhandled errors come back as 500."""
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+def create_user(role: UserRole) -> User:
+    """Insert a user with a unique email."""
+    with SessionLocal() as db:
+        user = User(
+            email=f"{role.value}-{uuid.uuid4().hex[:12]}@test.local",
+            password_hash="not-used",
+            role=role
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return user
+
+def create_product(seller: User, stock: int, price: float = 10.0, name: str = "Test product") -> Product:
+    """Insert a product for a seller."""
+    with SessionLocal() as db:
+        product = Product(seller_id=seller.id, name=name, description="", price=price, stock=stock)
+        db.add(product)
+        db.commit()
+        db.refresh(product)
+        return product
+
+def auth_header(user: User) -> dict:
+    """Authorization header for a user, without going through /login."""
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+@contextmanager
+def capture_statements():
+    """
+    Record every SQL statement the app executes, with its parameters.
+
+    Yields:
+        List that fills with (statement, parameters) tuples
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
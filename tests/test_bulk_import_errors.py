@@ -0,0 +1,45 @@
+"""
+The bulk import's per-row error report is in row order, and the error cap
+keeps the earliest rows.
+"""
+import routes.product_routes as product_routes
+from conftest import auth_header, client, create_product, create_user, run
+from models import UserRole
+
+def import_rows(seller, rows: list) -> dict:
+    """POST a JSON array to the bulk import and return the result."""
+    async def upload():
+        async with client() as http:
+            response = await http.post("/api/products/bulk", json=rows, headers=auth_header(seller))
+            assert response.status_code == 200, response.text
+            return response.json()
+    return run(upload())
+
+def upload_rows(other_product) -> list:
+    """Rows 1 and 3 fail the ownership check, which runs after validation fails row 2."""
+    return [
+        {"id": other_product.id, "name": "Not mine", "price": 1.0, "stock": 1},
+        {"name": "No price", "stock": 1},
+        {"id": other_product.id, "name": "Still not mine", "price": 1.0, "stock": 1},
+        {"name": "Fine", "price": 2.0, "stock": 2},
+    ]
+
+def test_errors_are_reported_in_row_order():
+    seller = create_user(UserRole.SELLER)
+    other_product = create_product(create_user(UserRole.SELLER), stock=1)
+
+    result = import_rows(seller, upload_rows(other_product))
+
+    assert result["created"] == 1
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [1, 2, 3]
+
+def test_error_cap_keeps_earliest_rows(monkeypatch):
+    monkeypatch.setattr(product_routes, "BULK_IMPORT_MAX_ERRORS", 2)
+    seller = create_user(UserRole.SELLER)
+    other_product = create_product(create_user(UserRole.SELLER), stock=1)
+
+    result = import_rows(seller, upload_rows(other_product))
+
+    assert result["failed"] == 3
+    assert [error["row"] for error in result["errors"]] == [1, 2]
@@ -0,0 +1,44 @@
+"""
+Concurrent checkouts must never sell more than the available stock.
+"""
+import asyncio
+from sqlalchemy import func, select
+from conftest import auth_header, client, create_product, create_user, run
+from database import SessionLocal
+from models import OrderItem, Product, UserRole
+
+BUYERS = 300
+STOCK = 100
+
+def test_parallel_checkouts_never_oversell():
+    seller = create_user(UserRole.SELLER)
+    product = create_product(seller, stock=STOCK)
+    buyers = [create_user(UserRole.BUYER) for _ in range(BUYERS)]
+
+    async def checkout_all():
+        async with client() as http:
+            return await asyncio.gather(*[
+                http.post(
+                    "/api/orders",
+                    json={"items": [{"product_id": product.id, "quantity": 1}]},
+                    headers=auth_header(buyer)
+                )
+                for buyer in buyers
+            ])
+
+    responses = run(checkout_all())
+    statuses = [response.status_code for response in responses]
+    created = statuses.count(201)
+
+    with SessionLocal() as db:
+        final_stock = db.scalar(select(Product.stock).where(Product.id == product.id))
+        sold = db.scalar(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product.id)
+        )
+
+    assert set(statuses) <= {201, 409}, statuses
+    assert final_stock >= 0
+    assert created == sold == STOCK - final_stock
+    # More buyers than stock: everything sells and the rest are refused
+    assert created == STOCK
+    assert statuses.count(409) == BUYERS - STOCK
@@ -0,0 +1,112 @@
+"""
+Listing queries must be answered from the listing indexes.
+
+Each listing is requested twice (first page and the page after its
+cursor), the statements it runs are captured, and SQLite's
+``EXPLAIN QUERY PLAN`` for each must show an index search rather than a
+full table scan. Single-table pages must also come out of the index in
+order, without a temporary sort.
+"""
+import re
+import catalog_cache
+from conftest import auth_header, capture_statements, client, create_product, create_user, run
+from database import SessionLocal, engine
+from models import Order, OrderItem, OrderStatus, UserRole
+
+# "SCAN products" reads the whole table; "SCAN products USING INDEX ..."
+# walks an index in order and stops at the LIMIT
+FULL_SCAN = re.compile(r"^SCAN \w+$")
+TEMP_SORT = "USE TEMP B-TREE"
+
+def query_plan(statement: str, parameters) -> list:
+    """Get the EXPLAIN QUERY PLAN detail lines of a statement."""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+def listing_plans(path: str, headers: dict) -> dict:
+    """
+    Capture the plans of the statements behind two pages of a listing.
+
+    Returns:
+        Mapping of the main table of each statement to its plans
+    """
+    async def fetch_pages():
+        async with client() as http:
+            # Warm the user cache so only listing statements are captured
+            await http.get(path, headers=headers)
+            # Bypass the catalog cache so the listing query itself runs
+            catalog_cache.listing_cache.clear()
+            with capture_statements() as statements:
+                first = await http.get(f"{path}?limit=2", headers=headers)
+                catalog_cache.listing_cache.clear()
+                second = await http.get(f"{path}?limit=2&cursor={first.json()['next_cursor']}", headers=headers)
+            assert first.status_code == second.status_code == 200
+            return statements
+
+    plans = {}
+    for statement, parameters in run(fetch_pages()):
+        table = re.search(r"\bFROM (\w+)", statement).group(1)
+        plans.setdefault(table, []).append(query_plan(statement, parameters))
+    return plans
+
+def assert_uses_index(plan: list, index: str):
+    assert any(f"USING INDEX {index}" in line for line in plan), plan
+    assert not any(FULL_SCAN.match(line) for line in plan), plan
+
+def create_catalog():
+    """A seller with several products and a buyer with several orders of them."""
+    seller = create_user(UserRole.SELLER)
+    products = [create_product(seller, stock=100, name=f"Product {i}") for i in range(5)]
+    buyer = create_user(UserRole.BUYER)
+    with SessionLocal() as db:
+        for product in products:
+            db.add(Order(
+                buyer_id=buyer.id,
+                total_amount=product.price,
+                status=OrderStatus.PENDING,
+                items=[OrderItem(product_id=product.id, quantity=1, price=product.price)]
+            ))
+        db.commit()
+    return seller, buyer
+
+def test_catalog_listing_uses_created_at_index():
+    create_catalog()
+    plans = listing_plans("/api/products", {})
+
+    assert len(plans["products"]) == 2
+    for plan in plans["products"]:
+        assert_uses_index(plan, "ix_products_created_at_id")
+        assert not any(TEMP_SORT in line for line in plan), plan
+
+def test_seller_products_use_seller_index():
+    seller, _ = create_catalog()
+    plans = listing_plans("/api/products/seller/my-products", auth_header(seller))
+
+    assert len(plans["products"]) == 2
+    for plan in plans["products"]:
+        assert_uses_index(plan, "ix_products_seller_id_created_at")
+        assert not any(TEMP_SORT in line for line in plan), plan
+
+def test_buyer_orders_use_buyer_and_order_item_indexes():
+    _, buyer = create_catalog()
+    plans = listing_plans("/api/orders", auth_header(buyer))
+
+    assert len(plans["orders"]) == 2
+    for plan in plans["orders"]:
+        assert_uses_index(plan, "ix_orders_buyer_id_created_at")
+        assert not any(TEMP_SORT in line for line in plan), plan
+    # Items of one page are sorted after the index lookup; at most a page's worth
+    for plan in plans["order_items"]:
+        assert_uses_index(plan, "ix_order_items_order_id")
+
+def test_seller_orders_use_seller_and_product_indexes():
+    seller, _ = create_catalog()
+    plans = listing_plans("/api/orders/seller/orders", auth_header(seller))
+
+    # The sort key spans orders and order_items, so no single index can
+    # provide the order; every table is still reached through an index
+    assert len(plans["order_items"]) == 2
+    for plan in plans["order_items"]:
+        assert_uses_index(plan, "ix_products_seller_id_created_at")
+        assert_uses_index(plan, "ix_order_items_product_id")
@@ -0,0 +1,60 @@
+"""
+Order listings must run a fixed number of SQL statements per page,
+however many orders and items the page holds (no N+1 queries).
+"""
+from conftest import auth_header, capture_statements, client, create_product, create_user, run
+from database import SessionLocal
+from models import Order, OrderItem, OrderStatus, UserRole
+
+ORDERS = 30
+SMALL_PAGE = 2
+LARGE_PAGE = ORDERS
+
+def create_orders(buyer, products):
+    """Give the buyer ORDERS orders, each with one item of every product."""
+    with SessionLocal() as db:
+        for _ in range(ORDERS):
+            db.add(Order(
+                buyer_id=buyer.id,
+                total_amount=sum(product.price for product in products),
+                status=OrderStatus.PENDING,
+                items=[OrderItem(product_id=product.id, quantity=1, price=product.price) for product in products]
+            ))
+        db.commit()
+
+def count_statements(path: str, headers: dict) -> int:
+    """Count the statements one GET runs, after a warm-up request fills the user cache."""
+    async def fetch():
+        async with client() as http:
+            assert (await http.get(path, headers=headers)).status_code == 200
+            with capture_statements() as statements:
+                response = await http.get(path, headers=headers)
+            assert response.status_code == 200
+            return len(statements), len(response.json()["items"])
+    count, returned = run(fetch())
+    assert returned > 0
+    return count
+
+def test_buyer_orders_query_count_is_constant():
+    seller = create_user(UserRole.SELLER)
+    products = [create_product(seller, stock=100, name=f"Product {i}") for i in range(3)]
+    buyer = create_user(UserRole.BUYER)
+    create_orders(buyer, products)
+
+    small = count_statements(f"/api/orders?limit={SMALL_PAGE}", auth_header(buyer))
+    large = count_statements(f"/api/orders?limit={LARGE_PAGE}", auth_header(buyer))
+
+    # One query for the page of orders, one for all of their items
+    assert small == large == 2
+
+def test_seller_orders_query_count_is_constant():
+    seller = create_user(UserRole.SELLER)
+    products = [create_product(seller, stock=100, name=f"Product {i}") for i in range(3)]
+    for _ in range(2):
+        create_orders(create_user(UserRole.BUYER), products)
+
+    small = count_statements(f"/api/orders/seller/orders?limit={SMALL_PAGE}", auth_header(seller))
+    large = count_statements("/api/orders/seller/orders?limit=100", auth_header(seller))
+
+    # Product names, buyer emails and order statuses come from one joined query
+    assert small == large == 1
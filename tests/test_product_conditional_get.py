@@ -0,0 +1,54 @@
+"""
+A revalidated product detail request is answered from updated_at alone.
+"""
+from catalog_cache import catalog_version_update
+from conftest import capture_statements, client, create_product, create_user, run
+from database import SessionLocal
+from models import Product, UserRole
+
+def test_not_modified_product_costs_one_lookup():
+    product = create_product(create_user(UserRole.SELLER), stock=5)
+    path = f"/api/products/{product.id}"
+
+    async def revalidate():
+        async with client() as http:
+            first = await http.get(path)
+            with capture_statements() as statements:
+                by_etag = await http.get(path, headers={"If-None-Match": first.headers["etag"]})
+                by_date = await http.get(path, headers={"If-Modified-Since": first.headers["last-modified"]})
+            return first, by_etag, by_date, statements
+
+    first, by_etag, by_date, statements = run(revalidate())
+
+    assert first.status_code == 200
+    assert by_etag.status_code == 304
+    assert by_date.status_code == 304
+    assert by_etag.headers["etag"] == first.headers["etag"]
+    # One single-column lookup per request, and no catalog state or product load
+    assert len(statements) == 2
+    for statement, _ in statements:
+        assert " ".join(statement.split()) == "SELECT products.updated_at FROM products WHERE products.id = ?"
+
+def test_changed_product_is_sent_again():
+    product = create_product(create_user(UserRole.SELLER), stock=5, name="Before")
+    path = f"/api/products/{product.id}"
+
+    async def fetch(path, headers=None):
+        async with client() as http:
+            return await http.get(path, headers=headers or {})
+
+    first = run(fetch(path))
+    with SessionLocal() as db:
+        stored = db.get(Product, product.id)
+        stored.name = "After"
+        stored.updated_at = stored.updated_at.replace(year=stored.updated_at.year + 1)
+        db.execute(catalog_version_update())
+        db.commit()
+
+    changed = run(fetch(path, {"If-None-Match": first.headers["etag"]}))
+    missing = run(fetch("/api/products/999999999", {"If-None-Match": first.headers["etag"]}))
+
+    assert changed.status_code == 200
+    assert changed.json()["name"] == "After"
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert missing.status_code == 404
@@ -0,0 +1,44 @@
+"""
+Profiling is off by default and must never fail the request it looks at.
+"""
+import sys
+import httpx
+import profiling
+from conftest import run
+from main import app
+from profiling import ProfilingMiddleware
+
+TOKEN = "secret-token"
+
+def get_products(headers: dict) -> httpx.Response:
+    """GET /api/products through ProfilingMiddleware."""
+    async def fetch():
+        transport = httpx.ASGITransport(app=ProfilingMiddleware(app), raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await http.get("/api/products", headers=headers)
+    return run(fetch())
+
+def test_disabled_profiling_loads_nothing():
+    assert not profiling.PROFILING_ENABLED
+    assert "pyinstrument" not in sys.modules
+    assert not any(path.startswith(profiling.PROFILE_ROUTES_PREFIX) for path in app.openapi()["paths"])
+
+def test_non_ascii_token_is_rejected(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    response = get_products({"X-Profile-Token": "t\xe9st".encode("latin-1")})
+
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert profiling.list_profiles() == []
+
+def test_matching_token_saves_a_profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", TOKEN)
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    response = get_products({"X-Profile-Token": TOKEN})
+
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert [name.startswith(profile_id) for name in profiling.list_profiles()] == [True]
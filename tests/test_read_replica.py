@@ -0,0 +1,100 @@
+"""
+With a read replica configured, catalog reads go to the replica and every
+write goes to the primary.
+
+The replica is a second SQLite file copied from the primary, standing in for
+a lagging read replica; a product renamed only in the copy shows which
+database a read came from.
+"""
+import os
+import sqlite3
+import pytest
+from sqlalchemy import create_engine, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+import catalog_cache
+import database
+from conftest import TEST_DIR, auth_header, client, create_product, create_user, run
+from models import UserRole
+
+REPLICA_URL = f"sqlite:///{os.path.join(TEST_DIR, 'replica.db')}"
+
+def copy_primary_to_replica():
+    """Overwrite the replica file with the primary's current contents."""
+    source = sqlite3.connect(database.engine.url.database)
+    target = sqlite3.connect(make_url(REPLICA_URL).database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+
+def execute(url: str, sql: str, **params):
+    """Run a statement on the database at ``url`` and return the first column of its first row, if any."""
+    bind = create_engine(url)
+    try:
+        with bind.begin() as conn:
+            result = conn.execute(text(sql), params)
+            return result.scalar() if result.returns_rows else None
+    finally:
+        bind.dispose()
+
+@pytest.fixture
+def replica_engine(monkeypatch):
+    """Route get_read_db to the replica file, as DATABASE_REPLICA_URL does."""
+    replica = database.create_replica_engine(REPLICA_URL)
+    monkeypatch.setattr(database, "ReadSessionLocal", async_sessionmaker(
+        replica, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    ))
+    # Cached catalog pages would hide which database served a read
+    catalog_cache.product_cache.clear()
+    catalog_cache.listing_cache.clear()
+    yield replica
+    catalog_cache.product_cache.clear()
+    catalog_cache.listing_cache.clear()
+
+def test_reads_use_replica_and_writes_use_primary(replica_engine):
+    primary_url = str(database.engine.url)
+    seller = create_user(UserRole.SELLER)
+    buyer = create_user(UserRole.BUYER)
+    product = create_product(seller, stock=10, name="Primary name")
+    copy_primary_to_replica()
+    execute(REPLICA_URL, "UPDATE products SET name = 'Replica name' WHERE id = :id", id=product.id)
+
+    async def scenario():
+        try:
+            async with client() as http:
+                detail = await http.get(f"/api/products/{product.id}")
+                listing = await http.get("/api/products", params={"limit": 100})
+                created = await http.post(
+                    "/api/products", headers=auth_header(seller),
+                    json={"name": "New product", "price": 5.0, "stock": 3}
+                )
+                ordered = await http.post(
+                    "/api/orders", headers=auth_header(buyer),
+                    json={"items": [{"product_id": product.id, "quantity": 2}]}
+                )
+            return detail, listing, created, ordered
+        finally:
+            await replica_engine.dispose()
+
+    detail, listing, created, ordered = run(scenario())
+
+    # get_product and get_products read the replica
+    assert detail.status_code == 200
+    assert detail.json()["name"] == "Replica name"
+    assert listing.status_code == 200
+    names = {item["id"]: item["name"] for item in listing.json()["items"]}
+    assert names[product.id] == "Replica name"
+
+    # create_product and create_order write to the primary only
+    assert created.status_code == 201
+    new_id = created.json()["id"]
+    assert execute(primary_url, "SELECT count(*) FROM products WHERE id = :id", id=new_id) == 1
+    assert execute(REPLICA_URL, "SELECT count(*) FROM products WHERE id = :id", id=new_id) == 0
+
+    assert ordered.status_code == 201
+    order_id = ordered.json()["id"]
+    assert execute(primary_url, "SELECT count(*) FROM orders WHERE id = :id", id=order_id) == 1
+    assert execute(REPLICA_URL, "SELECT count(*) FROM orders WHERE id = :id", id=order_id) == 0
+    assert execute(primary_url, "SELECT stock FROM products WHERE id = :id", id=product.id) == 8
+    assert execute(REPLICA_URL, "SELECT stock FROM products WHERE id = :id", id=product.id) == 10
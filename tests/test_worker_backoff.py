@@ -0,0 +1,48 @@
+"""
+A database error in the job worker loop is retried with backoff instead of
+ending the worker.
+"""
+import threading
+from sqlalchemy.exc import OperationalError
+import jobs
+
+class RecordingEvent(threading.Event):
+    """Stop event that records waits instead of sleeping."""
+
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return self.is_set()
+
+def test_worker_backs_off_on_database_errors(monkeypatch):
+    stop = RecordingEvent()
+    calls = []
+
+    def claim_job(db, worker_id):
+        calls.append(worker_id)
+        if len(calls) <= 3:
+            raise OperationalError("SELECT", {}, Exception("database is locked"))
+        stop.set()
+        return None
+
+    monkeypatch.setattr(jobs, "claim_job", claim_job)
+
+    assert jobs.run_worker(stop=stop) == 0
+    poll = jobs.JOB_POLL_INTERVAL_SECONDS
+    assert stop.waits == [poll, 2 * poll, 4 * poll, poll]
+
+def test_worker_once_stops_on_database_error(monkeypatch):
+    def claim_job(db, worker_id):
+        raise OperationalError("SELECT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(jobs, "claim_job", claim_job)
+
+    assert jobs.run_worker(once=True) == 0
+
+def test_error_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL_SECONDS", 1)
+    monkeypatch.setattr(jobs, "JOB_ERROR_BACKOFF_MAX_SECONDS", 60)
+    assert [jobs.error_backoff(failures) for failures in (1, 2, 7, 20)] == [1, 2, 60, 60]
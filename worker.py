@@ -0,0 +1,32 @@
+"""
+Background job worker.
+
+Run one or more alongside the API server:
+    python worker.py
+
+Pass --once to process every due job and exit (e.g. from cron).
+"""
+import argparse
+import logging
+import signal
+import threading
+from jobs import run_worker
+import order_pipeline  # noqa: F401  (registers job handlers)
+
+def main():
+    """Run the worker until SIGINT or SIGTERM."""
+    parser = argparse.ArgumentParser(description="Process background jobs")
+    parser.add_argument("--once", action="store_true", help="exit when no job is due")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    processed = run_worker(once=args.once, stop=stop)
+    print(f"[OK] Processed {processed} jobs")
+
+if __name__ == "__main__":
+    main()